@@ -0,0 +1,242 @@
+"""
+A local cache of users' avatar images, so the UI can get them from Tellus rather than every browser
+going off to Confluence for every one.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import mimetypes
+import pathlib
+import ssl
+from collections import OrderedDict
+
+import aiohttp
+from aiohttp import web
+
+from tellus.tellus_utils import http_session
+from tellus.wiring import R_AVATARS
+
+AVATAR_CACHE_DIR = "avatars"
+AVATAR_CACHE_MAX_BYTES = 50 * 1024 * 1024
+AVATAR_FETCH_TIMEOUT_SECONDS = 10
+# Avatar URLs change whenever the image does, so browsers can hang on to them for as long as they like
+AVATAR_MAX_AGE_SECONDS = 365 * 24 * 3600
+# Avatars are fetched with Confluence credentials, so always check who we are sending them to
+_VERIFIED_TLS = ssl.create_default_context()
+
+
+def _remove(path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _run_blocking(function, *args):
+    """
+    Run file I/O off the event loop, as every avatar in a full UserInfo run may need writing.
+    """
+    return asyncio.get_event_loop().run_in_executor(None, function, *args)
+
+
+class AvatarCache:
+    """
+    A size-bounded, disk-backed cache of avatar images, keyed by username.  When it gets too big, the least
+    recently used avatars are dropped.
+    """
+
+    _INDEX_FILE = "avatars.json"
+
+    def __init__(self, cache_dir, max_bytes=AVATAR_CACHE_MAX_BYTES, auth=None):
+        """
+        :param cache_dir: where to keep the avatar images
+        :param max_bytes: how big the cache is allowed to get
+        :param auth: the aiohttp.BasicAuth to fetch avatars with, if they need it
+        """
+        self._cache_dir = pathlib.Path(cache_dir)
+        self._max_bytes = max_bytes
+        self._auth = auth
+        self._avatars = OrderedDict()  # Least recently used first
+        self._total_bytes = 0
+        self._index_changed = False
+        self._load_index()
+
+    def _index_file(self):
+        return self._cache_dir / AvatarCache._INDEX_FILE
+
+    def _avatar_file(self, username):
+        return self._cache_dir / self._avatars[username]["file"]
+
+    def _load_index(self):
+        if not self._index_file().exists():
+            return
+
+        try:
+            avatars = json.loads(self._index_file().read_text())
+        except (OSError, ValueError) as exception:
+            logging.warning(
+                "Could not read the avatar cache index, so starting it over: %s",
+                repr(exception),
+            )
+            return
+
+        for username, avatar in avatars:
+            if (self._cache_dir / avatar["file"]).exists():
+                self._avatars[username] = avatar
+                self._total_bytes += avatar["size"]
+
+    async def save_index(self):
+        """
+        Save the index of what is cached, if it has changed - once after each batch of refreshes is plenty.
+        """
+        if not self._index_changed:
+            return
+        self._index_changed = False
+        index = json.dumps(list(self._avatars.items()))
+        await _run_blocking(self._write, AvatarCache._INDEX_FILE, index.encode("utf-8"))
+
+    def _write(self, file_name, content):
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        (self._cache_dir / file_name).write_bytes(content)
+
+    def _remove_files(self, file_names):
+        for file_name in file_names:
+            _remove(self._cache_dir / file_name)
+
+    @staticmethod
+    def _file_name(username, extension):
+        """
+        :return: the name to keep a user's avatar under - from a hash, so usernames can't be used to make paths
+        """
+        return hashlib.sha256(username.encode("utf-8")).hexdigest()[:32] + extension
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def __contains__(self, username):
+        return username in self._avatars
+
+    def avatar_url(self, username):
+        """
+        :return: the Tellus URL for the user's avatar, or None if it isn't cached
+        """
+        avatar = self._avatars.get(username)
+        if avatar is None:
+            return None
+        return f"/{R_AVATARS}/{username}?v={avatar['version']}"
+
+    async def refresh(self, username, source_url):
+        """
+        Make sure we have the user's current avatar - revalidating it if we already have it from this URL.
+
+        :param username: the user the avatar is for
+        :param source_url: where the avatar actually lives
+        :return: the Tellus URL for the avatar, or None if we don't have it
+        """
+        avatar = self._avatars.get(username)
+        headers = {}
+        if avatar is not None and avatar["source_url"] == source_url:
+            if avatar["etag"]:
+                headers["If-None-Match"] = avatar["etag"]
+            if avatar["last_modified"]:
+                headers["If-Modified-Since"] = avatar["last_modified"]
+        else:
+            avatar = None
+
+        try:
+            async with http_session().get(
+                source_url,
+                headers=headers,
+                auth=self._auth,
+                ssl=_VERIFIED_TLS,
+                timeout=aiohttp.ClientTimeout(total=AVATAR_FETCH_TIMEOUT_SECONDS),
+            ) as response:
+                if response.status == 304 and avatar is not None:
+                    self._avatars.move_to_end(username)
+                    self._index_changed = True
+                    return self.avatar_url(username)
+
+                if response.status != 200:
+                    logging.warning(
+                        "Could not retrieve the avatar for '%s' from %s - status was %s",
+                        username,
+                        source_url,
+                        response.status,
+                    )
+                    return self.avatar_url(username) if avatar else None
+
+                image = await response.read()
+                content_type = response.content_type
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+            logging.warning(
+                "Could not retrieve the avatar for '%s' from %s: %s",
+                username,
+                source_url,
+                repr(exception),
+            )
+            return self.avatar_url(username) if avatar else None
+
+        await self._store(
+            username,
+            image,
+            {
+                "source_url": source_url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": content_type,
+            },
+        )
+        return self.avatar_url(username)
+
+    async def _store(self, username, image, avatar):
+        version = hashlib.sha256(image).hexdigest()[:16]
+        extension = mimetypes.guess_extension(avatar["content_type"]) or ""
+        avatar.update(
+            {
+                "file": AvatarCache._file_name(username, extension),
+                "size": len(image),
+                "version": version,
+            }
+        )
+        await _run_blocking(self._write, avatar["file"], image)
+
+        stale_files = []
+        previous = self._avatars.pop(username, None)
+        if previous is not None:
+            self._total_bytes -= previous["size"]
+            if previous["file"] != avatar["file"]:
+                stale_files.append(previous["file"])
+        self._avatars[username] = avatar
+        self._total_bytes += avatar["size"]
+
+        while self._total_bytes > self._max_bytes and len(self._avatars) > 1:
+            evicted, evicted_avatar = self._avatars.popitem(last=False)
+            logging.debug("Dropping the avatar for '%s' from the cache.", evicted)
+            self._total_bytes -= evicted_avatar["size"]
+            stale_files.append(evicted_avatar["file"])
+
+        self._index_changed = True
+        if stale_files:
+            await _run_blocking(self._remove_files, stale_files)
+
+    async def serve_avatar(self, request):
+        username = request.match_info["username"]
+        if username not in self._avatars:
+            return web.Response(text=f"No avatar for '{username}'.", status=404)
+
+        self._avatars.move_to_end(username)
+        avatar = self._avatars[username]
+        return web.FileResponse(
+            self._avatar_file(username),
+            headers={
+                "cache-control": f"public, max-age={AVATAR_MAX_AGE_SECONDS}, immutable",
+                "content-type": avatar["content_type"],
+            },
+        )
+
+    def setup_routes(self, router):
+        router.add_get(f"/{R_AVATARS}/" + "{username}", self.serve_avatar)
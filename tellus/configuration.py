@@ -16,6 +16,7 @@ CONFLUENCE_API_PASSWORD = ""
 GITHUB_URL = ""
 GITHUB_ACCESS_TOKEN = ""
 GITHUB_API_URL = f"{GITHUB_URL}/api/v3"
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
 DNS_FILE_URL = f""
 
 # Google APIs
@@ -1,9 +1,12 @@
+import threading
+
 import gspread
 from googleapiclient.discovery import build
 from gspread.utils import extract_id_from_url
 from oauth2client.service_account import ServiceAccountCredentials
 
 from tellus.configuration import VAULT_PATH, ADMIN_ACCOUNT_DELEGATE
+from tellus.tellus_utils import TTLCache
 
 RETRIES = 3
 
@@ -12,21 +15,44 @@ SCOPES_SHEETS = [
     "https://spreadsheets.google.com/feeds",
 ]
 DEFAULT_DIRECTORY_FIELDS = ["name", "primaryEmail", "phones"]
+DIRECTORY_PAGE_SIZE = 500  # The most the Directory API will give us at once
+# Google's access tokens are good for an hour, so we authorize afresh comfortably before then
+AUTHORIZATION_CACHE_SECONDS = 45 * 60
 
-def _service_account_credentials(scopes, delegated_account=None):
-    client_config = get_credentials_from_vault(path=VAULT_PATH)
+_credentials_cache = TTLCache(AUTHORIZATION_CACHE_SECONDS)
+_gspread_client_cache = TTLCache(AUTHORIZATION_CACHE_SECONDS)
+# Sheets are retrieved on the blocking I/O threads, so make sure they only authorize once between them
+_authorization_lock = threading.RLock()
 
-    credentials = ServiceAccountCredentials.from_json_keyfile_dict(
-        client_config, scopes=scopes
-    )
-    if delegated_account:
-        return credentials.create_delegated(delegated_account)
+
+def _service_account_credentials(scopes, delegated_account=None):
+    key = (tuple(scopes), delegated_account)
+    with _authorization_lock:
+        credentials = _credentials_cache.get(key)
+        if credentials is None:
+            client_config = get_credentials_from_vault(path=VAULT_PATH)
+
+            credentials = ServiceAccountCredentials.from_json_keyfile_dict(
+                client_config, scopes=scopes
+            )
+            if delegated_account:
+                credentials = credentials.create_delegated(delegated_account)
+            _credentials_cache.put(key, credentials)
 
     return credentials
 
 
 def _authorized_gspread():
-    return gspread.authorize(_service_account_credentials(SCOPES_SHEETS))
+    """
+    :return: a gspread client - shared across sheets, until it is time to authorize again
+    """
+    with _authorization_lock:
+        client = _gspread_client_cache.get(SCOPES_SHEETS[0])
+        if client is None:
+            client = gspread.authorize(_service_account_credentials(SCOPES_SHEETS))
+            _gspread_client_cache.put(SCOPES_SHEETS[0], client)
+
+    return client
 
 
 def _authorized_service(credentials, api, version="v3"):
@@ -46,8 +72,38 @@ def get_spreadsheet_by_key(sheet_key):
     return _authorized_gspread().open_by_key(sheet_key)
 
 
-def get_spreadsheet_by_url(sheet_url):
-    return _authorized_gspread().open_by_url(sheet_url)
+def get_spreadsheet_by_url(sheet_url, client=None):
+    """
+    :param client: Mostly to allow for easy mocking - if None, will use the real (shared) gspread client
+    """
+    if client is None:
+        client = _authorized_gspread()
+    return client.open_by_url(sheet_url)
+
+
+def tab_range(tab_name):
+    """
+    :return: the A1 notation for the whole of a tab
+    """
+    escaped_name = str(tab_name).replace("'", "''")
+    return f"'{escaped_name}'"
+
+
+def retrieve_tab_values(spreadsheet, tab_names):
+    """
+    Retrieve the contents of several tabs of a spreadsheet in a single request (values.batchGet).
+
+    :param spreadsheet: the gspread Spreadsheet
+    :param tab_names: the names of the tabs to retrieve
+    :return: a map of tab name to the tab's values, as a list of rows
+    """
+    tab_names = list(dict.fromkeys(tab_names))
+    response = spreadsheet.values_batch_get([tab_range(tab) for tab in tab_names])
+    # The value ranges come back in the order they were asked for
+    return {
+        tab_name: value_range.get("values", [])
+        for tab_name, value_range in zip(tab_names, response.get("valueRanges", []))
+    }
 
 
 def extract_key(document_url):
@@ -69,30 +125,47 @@ def file_last_updated(document_key):
     return metadata.get("modifiedTime")
 
 
-def retrieve_gsuite_user_directory():
-    """
-    :return: our company directory as a dict, keyed by primary email.
-    """
+def _authorized_directory():
     credentials = _service_account_credentials(
         ["https://www.googleapis.com/auth/admin.directory.user.readonly"],
         delegated_account=ADMIN_ACCOUNT_DELEGATE,  # For now...
     )
 
-    service = build(
+    return build(
         "admin", "directory_v1", credentials=credentials, cache_discovery=False,
     )
 
+
+def retrieve_gsuite_user_directory(fields=None, service=None):
+    """
+    :param fields: the user fields to retrieve - defaults to DEFAULT_DIRECTORY_FIELDS
+    :param service: Mostly to allow for easy mocking - if None, will use the real Directory API
+    :return: our company directory as a dict, keyed by primary email
+    """
+    fields = tuple(fields or DEFAULT_DIRECTORY_FIELDS)
+    if "primaryEmail" not in fields:
+        fields += ("primaryEmail",)
+
+    if service is None:
+        service = _authorized_directory()
+
     parameters = {
         "domain": "",
-        "maxResults": 250,
+        "maxResults": DIRECTORY_PAGE_SIZE,
         "projection": "basic",
         "viewType": "domain_public",
+        "fields": f"nextPageToken,users({','.join(fields)})",
     }
+    # Each page's token comes from the one before, so there's no fetching them out of order
     # pylint: disable=no-member
-    result = service.users().list(**parameters).execute()["users"]
+    users = service.users()
+    request = users.list(**parameters)
     user_map = {}
-    for user in result:
-        user_map[user["primaryEmail"]] = user
+    while request is not None:
+        response = request.execute()
+        for user in response.get("users", []):
+            user_map[user["primaryEmail"]] = user
+        request = users.list_next(request, response)
 
     return user_map
 
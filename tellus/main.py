@@ -3,18 +3,28 @@ import logging
 import sys
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 
-from aiohttp import web
+from aiohttp import web, BasicAuth
 from aiohttp_session import session_middleware, SimpleCookieStorage
 
 from tellus import routes, __version__
-from tellus.configuration import TELLUS_SAVE_FILE_NAME
+from tellus.avatars import AvatarCache, AVATAR_CACHE_DIR
+from tellus.configuration import (
+    TELLUS_SAVE_FILE_NAME,
+    CONFLUENCE_API_USERNAME,
+    CONFLUENCE_API_PASSWORD,
+    GITHUB_WEBHOOK_SECRET,
+)
 from tellus.persistence import PickleFilePersistor
-from tellus.sources import Sourcer, SourceHandler
+from tellus.sources import Sourcer, SourceHandler, close_cpu_bound_pool
 from tellus.tells import Teller
 from tellus.tells_handler import TellsHandler
+from tellus.tellus_utils import close_http_session
 from tellus.tellus_sources.tellus_initialization_source import TellusInitialization
 from tellus.tellus_sources.socializer import Socializer
-from tellus.tellus_sources.tellus_yaml_source import TellusYMLSource
+from tellus.tellus_sources.tellus_yaml_source import (
+    TellusYMLSource,
+    GithubPushHandler,
+)
 from tellus.tellus_sources.user_info_source import UserInfo
 from tellus.users import UserHandler, UserManager
 from tellus.wiring import TELLUS_COOKIE_NAME
@@ -42,14 +52,17 @@ async def _load_tellus(teller, sourcer):
 
 
 async def on_prepare(_, response):
-    response.headers["cache-control"] = "no-cache"
+    # Anything that knows better (e.g., avatars) can set its own
+    response.headers.setdefault("cache-control", "no-cache")
 
 
-def _create_and_load_webapp(teller, sourcer, user_manager):
+def _create_and_load_webapp(teller, sourcer, user_manager, other_handlers=()):
     session = session_middleware(SimpleCookieStorage(cookie_name=TELLUS_COOKIE_NAME))
 
     app = web.Application(middlewares=[session])
     app.on_response_prepare.append(on_prepare)
+    app.on_cleanup.append(close_http_session)
+    app.on_cleanup.append(close_cpu_bound_pool)
 
     routes.loading(True)
 
@@ -57,7 +70,7 @@ def _create_and_load_webapp(teller, sourcer, user_manager):
     tell_handler = TellsHandler(teller, user_manager)
     source_handler = SourceHandler(sourcer)
 
-    routes.setup_routes(app, tell_handler, source_handler, user_handler)
+    routes.setup_routes(app, tell_handler, source_handler, user_handler, other_handlers)
 
     asyncio.ensure_future(_load_tellus(teller, sourcer))
 
@@ -73,22 +86,37 @@ def _run_app(args):
 
     user_manager = UserManager(teller)
 
-    # Note: Order Matters here, as the first Source will win for creating any new Tells
-    # And some sources will be affected by the results of earlier sources
-    # (e.g., UserInfo updates the list of valid users...)
+    avatar_cache = AvatarCache(
+        persistor.persistence_dir() / AVATAR_CACHE_DIR,
+        auth=BasicAuth(CONFLUENCE_API_USERNAME, CONFLUENCE_API_PASSWORD)
+        if CONFLUENCE_API_USERNAME
+        else None,
+    )
+
+    tellus_yml_source = TellusYMLSource(
+        teller, webhooks_enabled=bool(GITHUB_WEBHOOK_SECRET)
+    )
+
+    # Note: Sources load concurrently, other than waiting on the sources they declare as dependencies
+    # (e.g., Socializer waits on UserInfo, which updates the list of valid users...)
     enabled_sources = [
         TellusInitialization(
             teller
         ),  # This should almost certainly always be first, to ensure data is clean
-        UserInfo(user_manager),
-        TellusYMLSource(teller),
+        UserInfo(user_manager, avatar_cache=avatar_cache),
+        tellus_yml_source,
         Socializer(user_manager),
         #DNSHandler(teller),  # DNS Should probably always be last, as it is the noisiest
     ]
 
     sourcer = Sourcer(teller, enabled_sources)
 
-    app = _create_and_load_webapp(teller, sourcer, user_manager)
+    app = _create_and_load_webapp(
+        teller,
+        sourcer,
+        user_manager,
+        [avatar_cache, GithubPushHandler(tellus_yml_source)],
+    )
 
     logging.info("Starting web app...")
     web.run_app(app, host=args.host, port=args.port)
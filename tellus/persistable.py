@@ -4,7 +4,13 @@ from abc import ABC
 
 import jsonpickle
 
-from tellus.tellus_utils import now, now_string
+from tellus.tellus_utils import (
+    now,
+    now_epoch_micros,
+    datetime_from_epoch_micros,
+    epoch_micros_from_datetime,
+    datetime_string,
+)
 
 UNKNOWN_USER = "unknown"
 
@@ -13,10 +19,12 @@ class ZAuditInfo(object):
     """
     Standard audit information for persisted objects.  The naming is a bit of a hack to make it sort to the end
     of serialized data for readability.
+
+    Timestamps are stored as integer microseconds since the epoch, and only turned into ISO strings when asked for.
     """
 
     def __init__(self, created_by):
-        created_time = now_string()
+        created_time = now_epoch_micros()
 
         self._created_by = created_by
         self._created = created_time
@@ -41,11 +49,11 @@ class ZAuditInfo(object):
 
     @property
     def created(self):
-        return self._created
+        return datetime_string(self.created_datetime)
 
     @property
     def created_datetime(self):
-        return dt.datetime.fromisoformat(self._created)
+        return datetime_from_epoch_micros(self._created)
 
     @property
     def last_modified_by(self):
@@ -53,11 +61,11 @@ class ZAuditInfo(object):
 
     @property
     def last_modified(self):
-        return self._last_modified
+        return datetime_string(self.last_modified_datetime)
 
     @property
     def last_modified_datetime(self):
-        return dt.datetime.fromisoformat(self._last_modified)
+        return datetime_from_epoch_micros(self._last_modified)
 
     def seconds_since_last_modified(self, comparison_time=None):
         # largely to make certain testing easier
@@ -68,7 +76,22 @@ class ZAuditInfo(object):
 
     def modified(self, modified_by):
         self._last_modified_by = modified_by
-        self._last_modified = now_string()
+        self._last_modified = now_epoch_micros()
+
+    @staticmethod
+    def _legacy_timestamp_to_epoch_micros(timestamp):
+        if isinstance(timestamp, str):
+            return epoch_micros_from_datetime(dt.datetime.fromisoformat(timestamp))
+        return timestamp
+
+    def convert_legacy_timestamps(self):
+        """
+        Older save files stored the audit timestamps as ISO strings - convert them to epoch microseconds.
+        """
+        self._created = self._legacy_timestamp_to_epoch_micros(self._created)
+        self._last_modified = self._legacy_timestamp_to_epoch_micros(
+            self._last_modified
+        )
 
     def to_simple_data_dict(self):
         simple_dict = {
@@ -40,7 +40,10 @@ CONSUL_CHECK = f"/{R_UNSECURE}/consul_check"
 _loading = False
 
 
-def setup_routes(app, tell_handler, source_handler, user_manager):
+def setup_routes(app, tell_handler, source_handler, user_manager, other_handlers=()):
+    """
+    :param other_handlers: anything else with routes to set up - each needs a setup_routes(router)
+    """
     # ORDER MATTERS for many of these...
     router = app.router
     router.add_route("*", "/", home)
@@ -76,9 +79,14 @@ def setup_routes(app, tell_handler, source_handler, user_manager):
     router.add_get("/sources", source_handler.sources)
     router.add_get(f"/{R_SOURCES}", source_handler.sources)
     router.add_get(f"/{R_SOURCES}/load-all", source_handler.load_all_sources)
+    router.add_get(f"/{R_SOURCES}/jobs", source_handler.load_jobs)
+    router.add_get(f"/{R_SOURCES}/jobs/" + "{job_id}", source_handler.load_job_status)
     router.add_get(
         f"/{R_SOURCES}/" + "{source_id}/load", source_handler.load_single_source
     )
+    router.add_get(
+        f"/{R_SOURCES}/" + "{source_id}/cancel", source_handler.cancel_source_load
+    )
 
     # Mostly for debugging
     tell_handler.add_debug_route("Status", router, TELLUS_STATUS, tell_handler.status)
@@ -100,6 +108,8 @@ def setup_routes(app, tell_handler, source_handler, user_manager):
     )
 
     user_manager.setup_user_routes(router)
+    for handler in other_handlers:
+        handler.setup_routes(router)
 
     # This must be towards the end - HOWEVER, it must be before the master route
     router.add_static(f"/{STATIC_FILES}", path=STATIC_DIR)
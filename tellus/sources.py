@@ -1,11 +1,28 @@
+import asyncio
+import functools
+import heapq
 import json
 import logging
+import multiprocessing
+import random
+import time
+import uuid
 from abc import ABC
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
 from aiohttp import web
 from tellus.tell import Tell, InvalidAliasException
 from tellus.tells import Teller, TheresNoTellingException
-from tellus.tellus_utils import now_string, TellusException
-from hotsocket.timer import DurableTimer
+from tellus.tellus_utils import (
+    now,
+    now_string,
+    datetime_string,
+    datetime_from_string,
+    percentile,
+    TellusException,
+)
 
 from tellus.configuration import TELLUS_APP_USERNAME, TELLUS_PREFIX, TELLUS_INTERNAL
 
@@ -17,9 +34,124 @@ STATUS_RUNNING = "Running"
 STATUS_COMPLETED = "Completed"
 STATUS_FAILED = "Failed"
 
+BLOCKING_IO_THREADS = 8
+
+# Shared by all sources, so a full refresh can't tie up more than a bounded number of threads
+_blocking_io_executor = ThreadPoolExecutor(
+    max_workers=BLOCKING_IO_THREADS, thread_name_prefix="tellus-source-io"
+)
+
+CPU_BOUND_PROCESSES = 4
+
+_cpu_bound_executor = None  # Only started when a source first needs it
+
+
+def _cpu_bound_pool(broken=None):
+    """
+    :param broken: a pool that turned out to be broken - if it is still the current one, it is replaced
+    :return: the source process pool (started if necessary)
+    """
+    # pylint: disable=global-statement
+    global _cpu_bound_executor
+    if broken is not None and broken is _cpu_bound_executor:
+        broken.shutdown(wait=False)
+        _cpu_bound_executor = None
+    if _cpu_bound_executor is None:
+        # Forking Tellus itself could hand a worker a lock some other thread (e.g., aiohttp's, or the blocking I/O
+        # threads') was holding at the time - so start workers from a clean forkserver instead
+        _cpu_bound_executor = ProcessPoolExecutor(
+            max_workers=CPU_BOUND_PROCESSES,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _cpu_bound_executor
+
+
+async def close_cpu_bound_pool(_=None):
+    """
+    Shut down the source process pool, if it was started.  Registered to run when the web app is cleaned up.
+    """
+    # pylint: disable=global-statement
+    global _cpu_bound_executor
+    if _cpu_bound_executor is not None:
+        _cpu_bound_executor.shutdown(wait=False)
+    _cpu_bound_executor = None
+
+
+class SourceRunMetrics:
+    """
+    What happened during a single run of a Source - how long it took and how much it did.
+    """
+
+    PERCENTILES = (50, 90, 99)
+    SUMMARIZED = (
+        "duration_seconds",
+        "tells_touched",
+        "bytes_fetched",
+        "external_calls",
+    )
+
+    def __init__(self):
+        self.started = now_string()
+        self.status = STATUS_RUNNING
+        self.duration_seconds = None
+        self.tells_created = 0
+        self.tells_changed = 0
+        self.tells_unchanged = 0
+        self.bytes_fetched = 0
+        self.external_calls = 0
+        self._start_time = time.monotonic()
+
+    def finished(self, status):
+        self.status = status
+        self.duration_seconds = round(time.monotonic() - self._start_time, 3)
+
+    @property
+    def tells_touched(self):
+        return self.tells_created + self.tells_changed + self.tells_unchanged
+
+    def to_dict(self):
+        return {
+            "started": self.started,
+            "status": self.status,
+            "duration_seconds": self.duration_seconds,
+            "tells_created": self.tells_created,
+            "tells_changed": self.tells_changed,
+            "tells_unchanged": self.tells_unchanged,
+            "bytes_fetched": self.bytes_fetched,
+            "external_calls": self.external_calls,
+        }
+
+    @staticmethod
+    def summarize(run_history):
+        """
+        :param run_history: a collection of finished SourceRunMetrics
+        :return: a dict of the percentiles across those runs, for each of the SUMMARIZED metrics
+        """
+        summary = {}
+        for metric in SourceRunMetrics.SUMMARIZED:
+            values = [getattr(run, metric) for run in run_history]
+            summary[metric] = {
+                f"p{percent}": percentile(values, percent)
+                for percent in SourceRunMetrics.PERCENTILES
+            }
+        return summary
+
 
 class Source(ABC):
     RUN_ON_STARTUP = "on-startup"
+    DEFAULT_PERIOD = 3600  # seconds
+    DEFAULT_TIMEOUT = 600  # seconds
+
+    # After this many failures in a row, the source's circuit breaker opens, and it is skipped for a while
+    CIRCUIT_BREAKER_FAILURES = 3
+    CIRCUIT_BREAKER_BACKOFF = 300  # seconds - doubles for each further failure...
+    CIRCUIT_BREAKER_MAX_BACKOFF = 6 * 3600  # seconds - ...up to this long
+
+    RUN_HISTORY_SIZE = 50  # how many of the most recent runs to keep metrics for
+
+    # Data blocks on the source Tell, so the state of the source survives restarts
+    STATE_DATA = "source-state"
+    CHECKPOINT_DATA = "source-checkpoints"
 
     _PREFIX = f"{TELLUS_PREFIX}source-"
 
@@ -31,7 +163,15 @@ class Source(ABC):
         description,
         datum_display_name=None,
         run_restriction=None,
+        dependencies=None,
+        period=DEFAULT_PERIOD,
+        timeout=DEFAULT_TIMEOUT,
     ):
+        """
+        :param dependencies: the source ids of any sources that must finish loading before this one loads
+        :param period: how often (in seconds) this source should be reloaded once Tellus is running
+        :param timeout: how long (in seconds) a load of this source may take before it is cancelled
+        """
         if source_id != Tell.clean_alias(source_id):
             raise InvalidAliasException(
                 source_id, "Sources must have an alias that can be a valid Tell alias."
@@ -50,6 +190,179 @@ class Source(ABC):
             self._display_name = datum_display_name
 
         self._run_restriction = run_restriction
+        self._dependencies = tuple(dependencies) if dependencies else ()
+        self._period = period
+        self._timeout = timeout
+        self._consecutive_failures = 0
+        self._circuit_open_until = None
+        self._current_run = None
+        self._run_history = deque(maxlen=self.RUN_HISTORY_SIZE)
+        self._last_success = None
+        self._ran_since_startup = False
+        self._persist_after_run = False
+
+    async def run_blocking(self, function, *args, **kwargs):
+        """
+        Run a blocking call (e.g., a synchronous client library request) on the source I/O thread pool, so that
+        the event loop can keep serving requests while the call waits.  Each call counts as an external call in
+        this run's metrics.
+
+        Only use this for the retrieval itself - any updates to Tells should still happen back on the event loop.
+
+        :return: the result of calling function with the given arguments
+        """
+        self.record_external_call()
+        return await asyncio.get_event_loop().run_in_executor(
+            _blocking_io_executor, functools.partial(function, *args, **kwargs)
+        )
+
+    async def run_cpu_bound(self, function, *args):
+        """
+        Run CPU-heavy work (e.g., parsing a batch of files) in the source process pool, so that it neither blocks
+        the event loop nor competes with it for the GIL.  The function and its arguments have to be picklable,
+        and it should return plain data.
+
+        :return: the result of calling function with the given arguments
+        """
+        loop = asyncio.get_event_loop()
+        pool = _cpu_bound_pool()
+        try:
+            return await loop.run_in_executor(pool, function, *args)
+        except BrokenProcessPool:
+            logging.warning(
+                "The source process pool is broken, so '%s' is running %s on a thread instead "
+                "(the pool will be started over for the next call).",
+                self.source_id,
+                function.__name__,
+            )
+            _cpu_bound_pool(broken=pool)
+            # Still off the event loop - retrying in the new pool could just break it all over again
+            return await loop.run_in_executor(_blocking_io_executor, function, *args)
+
+    def record_external_call(self, bytes_fetched=0):
+        """
+        Record a call this source made to an external system during the current run, for its run metrics.
+        """
+        if self._current_run is not None:
+            self._current_run.external_calls += 1
+            self._current_run.bytes_fetched += bytes_fetched
+
+    def record_bytes_fetched(self, bytes_fetched):
+        if self._current_run is not None:
+            self._current_run.bytes_fetched += bytes_fetched
+
+    def record_tells(self, *, created=0, changed=0, unchanged=0):
+        """
+        Record how many Tells the current run created, changed, or left unchanged, for its run metrics.
+        """
+        if self._current_run is not None:
+            self._current_run.tells_created += created
+            self._current_run.tells_changed += changed
+            self._current_run.tells_unchanged += unchanged
+
+    @property
+    def run_history(self):
+        """
+        :return: the metrics for this source's most recent finished runs, oldest first
+        """
+        return list(self._run_history)
+
+    def _save_state(self):
+        if self._teller is None:
+            return
+        self.source_tell.update_data_from_source(
+            Source.STATE_DATA,
+            {
+                "last_run": self._last_run,
+                "last_success": self._last_success,
+                "last_run_message": self._last_run_message,
+                "status": self._status,
+                "consecutive_failures": self._consecutive_failures,
+                "circuit_open_until": datetime_string(self._circuit_open_until)
+                if self._circuit_open_until is not None
+                else None,
+            },
+            replace_data=True,
+        )
+
+    def restore_state(self):
+        """
+        Restore the state of this source from its source Tell - e.g., after Tellus restarts and loads its Tells.
+        """
+        if self._teller is None:
+            return
+        state = self.source_tell.get_data(Source.STATE_DATA)
+        if not state:
+            return
+
+        self._last_run = state.get("last_run")
+        self._last_success = state.get("last_success")
+        self._last_run_message = state.get("last_run_message", STATUS_NOT_RUN)
+        self._status = state.get("status", STATUS_NOT_RUN)
+        self._consecutive_failures = state.get("consecutive_failures", 0)
+        circuit_open_until = state.get("circuit_open_until")
+        self._circuit_open_until = (
+            datetime_from_string(circuit_open_until) if circuit_open_until else None
+        )
+        if self._status == STATUS_RUNNING:
+            # Tellus stopped in the middle of a run, so that run never finished
+            self._status = STATUS_FAILED
+            self._last_run_message = "Tellus restarted before this run finished."
+
+    def checkpoint(self, key, default=None):
+        """
+        :return: a value this source saved to resume from (e.g., a cursor or high-water mark), or default if none
+        """
+        if self._teller is None:
+            return default
+        return self.source_tell.get_datum(Source.CHECKPOINT_DATA, key, default)
+
+    def save_checkpoint(self, key, value):
+        """
+        Save a value this source can resume from on its next run, even if Tellus restarts in between.
+        """
+        if self._teller is not None:
+            self.source_tell.update_datum_from_source(
+                Source.CHECKPOINT_DATA, key, value
+            )
+
+    def persist(self):
+        """
+        Persist the Teller.  During a run, this waits until the run is over, so the run's final state (which is
+        saved on the source Tell) is persisted along with everything the run did.
+        """
+        if self._teller is None:
+            return
+        if self._current_run is not None:
+            self._persist_after_run = True
+        else:
+            self._teller.persist()
+
+    @property
+    def last_success(self):
+        return self._last_success
+
+    def seconds_since_success(self, as_of=None):
+        """
+        :return: how long ago this source last loaded successfully, or None if it never has
+        """
+        if self._last_success is None:
+            return None
+        if as_of is None:
+            as_of = now()
+        return (as_of - datetime_from_string(self._last_success)).total_seconds()
+
+    def is_fresh(self, as_of=None):
+        """
+        :param as_of: check as of a particular time - generally just for testing
+        :return: True if this source loaded successfully recently enough that it isn't due to load again yet
+        """
+        if self._run_restriction == self.RUN_ON_STARTUP:
+            return False  # These need to run every time Tellus starts
+        seconds_since_success = self.seconds_since_success(as_of)
+        return (
+            seconds_since_success is not None and seconds_since_success < self._period
+        )
 
     @property
     def source_tell_alias(self):
@@ -89,6 +402,22 @@ class Source(ABC):
         """
         return Teller(persistor=None)
 
+    def apply_staged_tells(self, staged_teller):
+        """
+        Apply the Tells this source staged in a transient Teller to the live Teller, in one step.
+
+        :param staged_teller: a Teller from create_transient_teller, holding this source's results
+        :return: the TellerDiff that was applied
+        """
+        diff = self._teller.apply_staged_tells(staged_teller, self.source_id)
+        logging.info("SOURCE '%s' - applied staged Tells: %s", self.source_id, diff)
+        self.record_tells(
+            created=len(diff.created),
+            changed=len(diff.changed),
+            unchanged=len(diff.unchanged),
+        )
+        return diff
+
     @property
     def source_id(self):
         return self._source_id
@@ -109,9 +438,53 @@ class Source(ABC):
     def run_restriction(self):
         return self._run_restriction
 
+    @property
+    def dependencies(self):
+        return self._dependencies
+
+    @property
+    def period(self):
+        return self._period
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def consecutive_failures(self):
+        return self._consecutive_failures
+
+    def circuit_open(self, as_of=None):
+        """
+        :param as_of: check as of a particular time - generally just for testing
+        :return: True if this source has been failing, and should be skipped until its circuit breaker closes
+        """
+        if self._circuit_open_until is None:
+            return False
+        if as_of is None:
+            as_of = now()
+        return as_of < self._circuit_open_until
+
+    def _trip_circuit_breaker(self):
+        if self._consecutive_failures < self.CIRCUIT_BREAKER_FAILURES:
+            return
+
+        backoff = min(
+            self.CIRCUIT_BREAKER_BACKOFF
+            * 2 ** (self._consecutive_failures - self.CIRCUIT_BREAKER_FAILURES),
+            self.CIRCUIT_BREAKER_MAX_BACKOFF,
+        )
+        self._circuit_open_until = now() + timedelta(seconds=backoff)
+        logging.warning(
+            "Source '%s' has failed %s times in a row, so will be skipped for %s seconds.",
+            self._source_id,
+            self._consecutive_failures,
+            backoff,
+        )
+
     @property
     def should_run(self):
-        if self._run_restriction == self.RUN_ON_STARTUP and self._last_run is not None:
+        if self._run_restriction == self.RUN_ON_STARTUP and self._ran_since_startup:
             return False
 
         return True
@@ -123,10 +496,36 @@ class Source(ABC):
         self._last_run = now_string()
         self._last_run_message = "Currently running..."
         self._status = STATUS_RUNNING
+        self._current_run = SourceRunMetrics()
+        self._ran_since_startup = True
+        self._save_state()
+
+    def _finish_run(self):
+        if self._current_run is not None:
+            self._current_run.finished(self._status)
+            self._run_history.append(self._current_run)
+            self._current_run = None
+
+        self._save_state()
+        if self._persist_after_run:
+            self._persist_after_run = False
+            self.persist()
 
     def status_failed(self, message):
         self._last_run_message = message
         self._status = STATUS_FAILED
+        self._consecutive_failures += 1
+        self._trip_circuit_breaker()
+        self._finish_run()
+
+    def status_cancelled(self, message):
+        """
+        A cancelled run never finished, so counts as failed - but as it was stopped on purpose, it doesn't count
+        towards the circuit breaker.
+        """
+        self._last_run_message = message
+        self._status = STATUS_FAILED
+        self._finish_run()
 
     def status_complete(self, message):
         """
@@ -134,6 +533,10 @@ class Source(ABC):
         """
         self._last_run_message = message
         self._status = STATUS_COMPLETED
+        self._last_success = self._last_run
+        self._consecutive_failures = 0
+        self._circuit_open_until = None
+        self._finish_run()
 
     @property
     def load_completed(self):
@@ -170,8 +573,17 @@ class Source(ABC):
             "description": self.description,
             "display_name": self.display_name,
             "last_run": self.last_run,
+            "last_success": self._last_success,
             "last_run_message": self._last_run_message,
             "status": self._status,
+            "period": self._period,
+            "timeout": self._timeout,
+            "consecutive_failures": self._consecutive_failures,
+            "circuit_open_until": datetime_string(self._circuit_open_until)
+            if self.circuit_open()
+            else None,
+            "run_history": [run.to_dict() for run in self._run_history],
+            "run_percentiles": SourceRunMetrics.summarize(self._run_history),
         }
 
 
@@ -183,21 +595,157 @@ class DuplicateSourceException(TellusException):
         )
 
 
+class SourceDependencyException(TellusException):
+    def __init__(self, source_ids):
+        TellusException.__init__(
+            self,
+            f"The dependencies between these sources form a cycle, so they can never load: {source_ids}",
+        )
+
+
+class SourceLoadJob:
+    """
+    A load of one (or all) sources, running in the background so it can be checked on by its job id.
+    """
+
+    def __init__(self, source_id, load):
+        """
+        :param source_id: the source being loaded, or None if this job is loading all of the sources
+        :param load: the coroutine that does the load
+        """
+        self._job_id = uuid.uuid4().hex
+        self._source_id = source_id
+        self._started = now_string()
+        self._finished = None
+        self._result = None
+        self._failed = False
+        self._task = asyncio.ensure_future(load)
+        self._task.add_done_callback(self._load_finished)
+
+    def _load_finished(self, task):
+        self._finished = now_string()
+        if task.cancelled():
+            self._failed = True
+            self._result = "Load was cancelled."
+        elif task.exception() is not None:
+            self._failed = True
+            self._result = f"Load failed with exception: {repr(task.exception())}"
+        else:
+            self._result = task.result()
+
+    @property
+    def job_id(self):
+        return self._job_id
+
+    @property
+    def source_id(self):
+        return self._source_id
+
+    @property
+    def task(self):
+        return self._task
+
+    @property
+    def done(self):
+        return self._task.done()
+
+    @property
+    def status(self):
+        if not self.done:
+            return STATUS_RUNNING
+        if self._failed:
+            return STATUS_FAILED
+        return STATUS_COMPLETED
+
+    def job_info(self):
+        return {
+            "job_id": self._job_id,
+            "source_id": self._source_id,
+            "status": self.status,
+            "started": self._started,
+            "finished": self._finished,
+            "result": self._result,
+        }
+
+
 class Sourcer:
-    DEFAULT_PERIOD = 3600  # seconds
+    DEFAULT_PERIOD = Source.DEFAULT_PERIOD
+    MAX_JOBS = (
+        100  # how many of the most recent load jobs to keep around for status checks
+    )
+    PERIOD_JITTER = 0.1  # fraction of a source's period to randomly shift each load by
 
-    def __init__(self, teller, enabled_sources):
+    def __init__(self, teller, enabled_sources, clock=None, sleep=None):
+        """
+        :param clock: Mostly to allow for easy testing - if None, will use the event loop's clock
+        :param sleep: Mostly to allow for easy testing - if None, will use asyncio.sleep
+        """
         self._teller = teller
+        self._clock = clock
+        self._sleep = sleep if sleep is not None else asyncio.sleep
         self._sources = {}
         for source in enabled_sources:
             if source.source_id in self._sources:
                 raise DuplicateSourceException(source.source_id)
             self._sources[source.source_id] = source
 
+        self._load_order = self._sources_in_dependency_order()
         self._runs = 0
+        self._schedule = []  # a heap of (next load time, source id)
+        self._in_flight = {}  # source id to the currently running load of that source
+        self._scheduled_loads = (
+            {}
+        )  # source id to its latest periodic load (which may be waiting on dependencies)
+        self._jobs = OrderedDict()  # job id to job, oldest first
+        self._running_jobs = (
+            {}
+        )  # source id (None for all sources) to its currently running job
 
         logging.info("The following sources are enabled:  %s", self.active_source_ids())
 
+    def _enabled_dependencies(self, source):
+        return [
+            dependency
+            for dependency in source.dependencies
+            if dependency in self._sources
+        ]
+
+    def _sources_in_dependency_order(self):
+        """
+        :return: the enabled sources, ordered so each comes after every source it depends on (otherwise keeping the
+            order they were enabled in).  Dependencies on sources that aren't enabled are ignored.
+        :raises: SourceDependencyException if the dependencies contain a cycle
+        """
+        for source in self._sources.values():
+            for dependency in source.dependencies:
+                if dependency not in self._sources:
+                    logging.warning(
+                        "Source '%s' depends on source '%s', which is not enabled.  Ignoring that dependency.",
+                        source.source_id,
+                        dependency,
+                    )
+
+        ordered = []
+        remaining = list(self._sources.values())
+        while remaining:
+            ordered_ids = [source.source_id for source in ordered]
+            ready = [
+                source
+                for source in remaining
+                if all(
+                    dependency in ordered_ids
+                    for dependency in self._enabled_dependencies(source)
+                )
+            ]
+            if not ready:
+                raise SourceDependencyException(
+                    [source.source_id for source in remaining]
+                )
+            ordered += ready
+            remaining = [source for source in remaining if source not in ready]
+
+        return ordered
+
     def active_source_ids(self):
         return list(self._sources.keys())
 
@@ -211,25 +759,124 @@ class Sourcer:
 
         return info_dict
 
-    async def load_sources(self):
+    async def load_sources(self, skip_fresh=False):
+        """
+        Load all of the enabled sources.  Sources are loaded concurrently, except that each source waits for any
+        sources it depends on to finish first.
+
+        :param skip_fresh: if True, skip any sources that loaded successfully within their period
+            (e.g., before a restart)
+        """
         self._runs += 1
         logging.info("SOURCER RUN %s STARTING.", self._runs)
 
-        for source in self._sources.values():
-            await self.run_load_source(source)
+        loads = {}
+        for source in self._load_order:
+            dependency_loads = [
+                loads[dependency] for dependency in self._enabled_dependencies(source)
+            ]
+            loads[source.source_id] = asyncio.ensure_future(
+                self._load_after(dependency_loads, source, skip_fresh)
+            )
+        await asyncio.gather(*loads.values())
 
         logging.info(
             "SOURCER RUN %s COMPLETE.  All enabled sources loaded.", self._runs
         )
 
+    async def _load_after(self, dependency_loads, source, skip_fresh=False):
+        # However the dependencies' loads went (even if someone cancelled them), this source still loads
+        await asyncio.gather(*dependency_loads, return_exceptions=True)
+        if skip_fresh and source.is_fresh():
+            message = (
+                f"'{source.source_id}' source will not load, as it last loaded successfully at "
+                f"{source.last_success}, which is within its period of {source.period} seconds."
+            )
+            logging.info(message)
+            return message
+
+        load = self._single_flight_load(source)
+        try:
+            return await asyncio.shield(load)
+        except asyncio.CancelledError:
+            if not load.cancelled():
+                raise  # It's this wait that was cancelled, not the load
+            # Someone cancelled the load itself - which shouldn't stop the rest of the sources loading
+            return f"'{source.source_id}' source load was cancelled."
+
+    def _single_flight_load(self, source, force=False):
+        """
+        :param force: if True, will load even if the source's circuit breaker is open
+        :return: the task for the load of this source that is already running, or for a new load if none is
+        """
+        load = self._in_flight.get(source.source_id)
+        if load is None or load.done():
+            load = asyncio.ensure_future(self.run_load_source(source, force))
+            self._in_flight[source.source_id] = load
+        return load
+
+    def cancel_load(self, source_id):
+        """
+        Cancel the running load of a source, if there is one.
+
+        :return: True if a load was cancelled, False if the source was not loading
+        """
+        if not self.is_loading(source_id):
+            return False
+        return self._in_flight[source_id].cancel()
+
+    def is_loading(self, source_id):
+        load = self._in_flight.get(source_id)
+        return load is not None and not load.done()
+
     async def load_source_for_id(self, source_id):
-        return await self.run_load_source(self._sources[source_id])
+        """
+        Load a single source.  If that source is already loading, this joins that load rather than starting another.
+        As this is an explicit request for the source, it ignores the source's circuit breaker.
+        """
+        return await asyncio.shield(
+            self._single_flight_load(self._sources[source_id], force=True)
+        )
+
+    def start_load_job(self, source_id=None):
+        """
+        Start loading a source in the background.  If that same load is already running, returns its job instead.
+
+        :param source_id: the source to load, or None to load all of the sources
+        :return: the SourceLoadJob for the load
+        """
+        running_job = self._running_jobs.get(source_id)
+        if running_job is not None and not running_job.done:
+            return running_job
+
+        if source_id is None:
+            job = SourceLoadJob(source_id, self.load_sources())
+        else:
+            job = SourceLoadJob(source_id, self.load_source_for_id(source_id))
+        self._running_jobs[source_id] = job
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.MAX_JOBS:
+            self._jobs.popitem(last=False)
+        return job
+
+    def get_job(self, job_id):
+        """
+        :return: the job with this id, or None if there is no such job (or it is too old to still be kept around)
+        """
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        """
+        :return: the recent jobs, most recent first
+        """
+        return list(reversed(self._jobs.values()))
 
     @staticmethod
-    async def run_load_source(source):
+    async def run_load_source(source, force=False):
         """
         Does any necessary common set up and teardown for the load, but mostly defers to load_source.
 
+        :param force: if True, will load even if the source's circuit breaker is open
         :return: a string with any message about the load results (e.g., for return in a web response)
         """
         if not source.should_run:
@@ -240,10 +887,26 @@ class Sourcer:
             logging.info(message)
             return message
 
+        if source.circuit_open() and not force:
+            message = (
+                f"'{source.source_id}' source will not load, as it has failed {source.consecutive_failures} times "
+                f"in a row.  It will be tried again after {source.source_info()['circuit_open_until']}."
+            )
+            logging.info(message)
+            return message
+
         logging.info("SOURCE:  '%s' - starting load", source.source_id)
         source.status_starting()
         try:
-            message = await source.load_source()
+            message = await asyncio.wait_for(source.load_source(), source.timeout)
+        except asyncio.TimeoutError:
+            message = f"'{source.source_id}' source did not finish loading within {source.timeout} seconds, so was cancelled."
+            source.status_failed(message)
+            logging.error(message)
+            return message
+        except asyncio.CancelledError:
+            source.status_cancelled(f"'{source.source_id}' source load was cancelled.")
+            raise
         # pylint: disable=broad-except
         except Exception as exception:
             message = f"'{source.source_id}' source failed to load, with exception: {repr(exception)}"
@@ -261,18 +924,96 @@ class Sourcer:
     async def periodic_load_alert(exception):
         logging.error("Received an error during source run: %s", repr(exception))
 
-    def start_periodic_loads(self, period=DEFAULT_PERIOD):
-        logging.info(
-            "Scheduling Tellus to reload its sources every %s seconds.", period
+    def restore_source_state(self):
+        for source in self._sources.values():
+            source.restore_state()
+
+    def start_periodic_loads(self):
+        """
+        Load all of the sources now (other than any that are still fresh from before a restart), and then keep
+        reloading each source on its own period.
+        """
+        self.restore_source_state()
+        for source in self._sources.values():
+            logging.info(
+                "Scheduling Tellus to reload the '%s' source every %s seconds.",
+                source.source_id,
+                source.period,
+            )
+
+        return asyncio.ensure_future(self._run_periodic_loads())
+
+    def _next_load_time(self, source, after):
+        jitter = random.uniform(-self.PERIOD_JITTER, self.PERIOD_JITTER)
+        return after + source.period * (1 + jitter)
+
+    def _schedule_load(self, source, after):
+        """
+        :param after: the (event loop) time to schedule the next load after - generally, the time of the last load
+        """
+        heapq.heappush(
+            self._schedule, (self._next_load_time(source, after), source.source_id)
         )
-        if period < self.DEFAULT_PERIOD:
+
+    def _now(self):
+        if self._clock is None:
+            return asyncio.get_event_loop().time()
+        return self._clock()
+
+    async def _run_periodic_loads(self):
+        try:
+            await self.load_sources(skip_fresh=True)
+        # pylint: disable=broad-except
+        except Exception as exception:
+            await self.periodic_load_alert(exception)
+
+        self._schedule_periodic_loads()
+        while self._schedule:
+            await self._run_next_scheduled_load()
+
+    def _schedule_periodic_loads(self):
+        for source in self._sources.values():
+            if source.is_fresh():
+                # Skipped as fresh, so the next load is due a period after the last successful one
+                self._schedule_load(
+                    source, self._now() - source.seconds_since_success()
+                )
+            else:
+                self._schedule_load(source, self._now())
+
+    async def _run_next_scheduled_load(self):
+        """
+        Wait until the next scheduled load is due, then start it (and schedule the one after).  Like the startup
+        load, it waits for any of its dependencies that are currently loading to finish first.
+
+        :return: the task for the load, or None if it was skipped
+        """
+        load_time, source_id = heapq.heappop(self._schedule)
+        await self._sleep(max(0, load_time - self._now()))
+
+        source = self._sources[source_id]
+        self._schedule_load(source, load_time)
+
+        scheduled_load = self._scheduled_loads.get(source_id)
+        if self.is_loading(source_id) or (
+            scheduled_load is not None and not scheduled_load.done()
+        ):
             logging.warning(
-                "The period is less than the default period of %s.  Be advised.",
-                self.DEFAULT_PERIOD,
+                "Source '%s' is still loading from an earlier load, so skipping this scheduled one.",
+                source_id,
             )
+            return None
 
-        timer = DurableTimer(None, self.load_sources, period)
-        timer.start()
+        dependency_loads = [
+            asyncio.shield(self._in_flight[dependency])
+            for dependency in self._enabled_dependencies(source)
+            if self.is_loading(dependency)
+        ]
+        scheduled_load = asyncio.ensure_future(
+            self._load_after(dependency_loads, source)
+        )
+        self._scheduled_loads[source_id] = scheduled_load
+        return scheduled_load
 
 
 class SourceHandler(object):
@@ -288,9 +1029,31 @@ class SourceHandler(object):
 
     async def load_single_source(self, request):
         source_id = request.match_info["source_id"]
-        await self._sourcer.load_source_for_id(source_id)
-        return web.Response(text=f"Load started for source {source_id}")
+        if source_id not in self._sourcer.active_source_ids():
+            return web.Response(
+                text=f"There is no active source '{source_id}' to load.", status=404
+            )
+
+        job = self._sourcer.start_load_job(source_id)
+        return web.json_response(job.job_info())
 
     async def load_all_sources(self, _):
-        await self._sourcer.load_sources()
-        return web.Response(text="Load started for all sources.")
+        job = self._sourcer.start_load_job()
+        return web.json_response(job.job_info())
+
+    async def load_jobs(self, _):
+        return web.json_response([job.job_info() for job in self._sourcer.jobs()])
+
+    async def cancel_source_load(self, request):
+        source_id = request.match_info["source_id"]
+        if self._sourcer.cancel_load(source_id):
+            return web.Response(text=f"Cancelled the load of source {source_id}.")
+        return web.Response(text=f"Source {source_id} is not currently loading.")
+
+    async def load_job_status(self, request):
+        job_id = request.match_info["job_id"]
+        job = self._sourcer.get_job(job_id)
+        if job is None:
+            return web.Response(text=f"There is no load job '{job_id}'.", status=404)
+
+        return web.json_response(job.job_info())
@@ -1,7 +1,10 @@
-import copy
+import functools
 import logging
 import re
 import json
+import sys
+import weakref
+
 import jsonpickle
 from sortedcontainers import SortedSet
 
@@ -42,6 +45,29 @@ class InvalidTellUpdateException(TellusException):
 
 SRC_TELLUS_USER = TELLUS_USER_MODIFIED
 
+# Cached representations (dicts and json) of each Tell, dropped whenever the Tell is modified.
+# These are kept outside of the Tell itself so they never make it into the save file.
+_CACHED_REPRESENTATIONS = weakref.WeakKeyDictionary()
+
+# Aliases and tags are cleaned on every lookup, and the same ones come through over and over again
+ALIAS_CACHE_SIZE = 8192
+
+_TAG_SEPARATORS = re.compile(r"\s|[,.]")
+_NON_SLUG_CHARACTERS = re.compile(r"[^-\w\s]")
+_SLUG_SEPARATORS = re.compile(r"(\s|\_|\+)+")
+
+
+def intern_string(value):
+    """
+    Tags, source ids and datum keys repeat across a great many Tells - interning them means all of those Tells share
+    one copy of each string (and comparing them is cheaper).
+
+    :return: the interned string, or value unchanged if it isn't a string
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
 
 class Tell(Persistable):
     ALIAS = "alias"
@@ -99,22 +125,23 @@ class Tell(Persistable):
         self.coalesce()
 
     @staticmethod
+    @functools.lru_cache(maxsize=ALIAS_CACHE_SIZE)
     def slugify(string):
         """
         Creates a canonical "slug" from a string.  Canonical tags and aliases in Tellus can only contain
-        lowercase alphanumeric characters and dashes.
+        lowercase alphanumeric characters and dashes.  Results are cached.
 
         :param string: any string intended to be an alias or a tag
         :return: a slugified version of the string (generally URL-acceptable)
         """
         slug = string.strip().lower()
-        slug = re.sub(r"[^-\w\s]", " ", slug).strip()
-        slug = re.sub(r"(\s|\_|\+)+", "-", slug)
-        return slug
+        slug = _NON_SLUG_CHARACTERS.sub(" ", slug).strip()
+        slug = _SLUG_SEPARATORS.sub("-", slug)
+        return intern_string(slug)
 
     @staticmethod
     def string_to_tags(tag_string):
-        tags = re.split(r"\s|[,.]", tag_string)
+        tags = _TAG_SEPARATORS.split(tag_string)
         clean_tags = SortedSet()
         for tag in tags:
             slug = Tell.slugify(tag)
@@ -123,9 +150,11 @@ class Tell(Persistable):
         return clean_tags
 
     @staticmethod
+    @functools.lru_cache(maxsize=ALIAS_CACHE_SIZE)
     def is_slug_reserved(alias_slug, category_override=None):
         """
         Check to see if the slugified string is one of a small number of strings that are reserved by Tellus.
+        Results are cached.
         """
         first = alias_slug.split("-")[0]
         if category_override != TELLUS_INTERNAL and (
@@ -158,6 +187,7 @@ class Tell(Persistable):
         and should only ever be done by the Teller, either during creation or an update.
         """
         self._alias = self._validate_alias(alias)
+        self._clear_cached_representations()
 
     @property
     def alias(self) -> str:
@@ -251,6 +281,7 @@ class Tell(Persistable):
     def add_to_tell_group(self, grouping_tell):
         self.add_tag(grouping_tell.alias)
         self._groups.add(grouping_tell.alias)
+        self._clear_cached_representations()
         if not grouping_tell.in_group(grouping_tell.alias):
             # Grouping Tells should always be in their own group once created...
             grouping_tell.add_to_tell_group(grouping_tell)
@@ -283,7 +314,10 @@ class Tell(Persistable):
         self.add_tags([Tell.slugify(tag)])
 
     def add_tags(self, tags):
-        self._tags.update(tags)
+        new_tags = [intern_string(tag) for tag in tags if tag not in self._tags]
+        if new_tags:
+            self._tags.update(new_tags)
+            self._clear_cached_representations()
 
     def has_all_tags(self, tags, include_alias=True):
         if include_alias and self.alias in tags:
@@ -300,6 +334,7 @@ class Tell(Persistable):
             self._tags.remove(tag)
         except KeyError:
             return None
+        self._clear_cached_representations()
         return tag
 
     @staticmethod
@@ -322,7 +357,9 @@ class Tell(Persistable):
                 f"Illegal attempt to add category '{category}' (to tell '{self._alias}').  "
                 f"Valid categories are: {TELLUS_CATEGORIES}"
             )
-        self._categories.add(category)
+        if category not in self._categories:
+            self._categories.add(category)
+            self._clear_cached_representations()
 
     def remove_category(self, category):
         if category not in self._categories:
@@ -332,6 +369,7 @@ class Tell(Persistable):
                 category,
             )
         self._categories.remove(category)
+        self._clear_cached_representations()
 
     def in_all_categories(self, categories):
         # Not sure if this is efficient, but it sure is clean
@@ -384,8 +422,11 @@ class Tell(Persistable):
         set_value = None if value == "" else value
         if property_name in (Tell.DESCRIPTION, Tell.GO_URL):
             current_value = getattr(self, internal_name)
+            if current_value == set_value:
+                return True
             setattr(self, internal_name, set_value)
-            if current_value is not None and current_value != set_value:
+            self._clear_cached_representations()
+            if current_value is not None:
                 return False
 
         if property_name == Tell.TAGS:
@@ -397,13 +438,15 @@ class Tell(Persistable):
         if isinstance(tag_value, str):
             tags = SortedSet(Tell.string_to_tags(tag_value))
         else:
-            tags = SortedSet(tag_value)
+            tags = SortedSet(intern_string(tag) for tag in tag_value)
 
         if tags.__contains__(""):
             tags.remove("")
 
         if replace_tags:
-            self._tags = tags
+            if tags != self._tags:
+                self._tags = tags
+                self._clear_cached_representations()
         else:
             self.add_tags(tags)
 
@@ -448,11 +491,13 @@ class Tell(Persistable):
 
     def clear_data(self, source_id):
         if source_id in self._data:
+            self._clear_cached_representations()
             return self._data.pop(source_id)
         return None
 
     def remove_datum(self, source_id, key):
         if source_id in self._data and key in self._data[source_id]:
+            self._clear_cached_representations()
             return self._data[source_id].pop(key)
         return None
 
@@ -462,11 +507,14 @@ class Tell(Persistable):
     def update_data_from_source(
         self, source_id, data_dict, modified_by=None, replace_data=False
     ):
-        self._update_data_from_source(source_id, data_dict, replace_data)
-        if modified_by:
-            self.modified(modified_by)
-        else:
-            self.modified(source_id)
+        # Sources tend to re-send the same data on every run - in which case there is nothing to write,
+        # and nothing has been modified.
+        if not self._is_data_unchanged(source_id, data_dict, replace_data):
+            self._update_data_from_source(source_id, data_dict, replace_data)
+            if modified_by:
+                self.modified(modified_by)
+            else:
+                self.modified(source_id)
 
         # todo: should either add category here, or not depending on how I handle categories...
         if source_id in TELLUS_CATEGORIES:
@@ -474,11 +522,53 @@ class Tell(Persistable):
 
         self.coalesce()  # We always coalesce after an external data update, unless explicitly suppressed.
 
+    def _is_data_unchanged(self, source_id, data_dict, replace_data=False):
+        """
+        :return: True if applying data_dict to this source's data block would not change anything.
+        """
+        current_data = self._data.get(source_id)
+        if current_data is None:
+            return False
+
+        if Tell.TAGS in data_dict and Tell.TAGS not in current_data:
+            # coalesce() moves a source's tags into its source-tags datum, so compare against those
+            data_dict = dict(data_dict)
+            data_dict[Tell._SRC_TAGS] = data_dict.pop(Tell.TAGS)
+
+        if replace_data:
+            return current_data == data_dict
+
+        return all(
+            key in current_data and current_data[key] == value
+            for key, value in data_dict.items()
+        )
+
+    @staticmethod
+    def _copy_data(value):
+        """
+        A cheaper replacement for copy.deepcopy for source data:  only dicts, lists and sets are copied, and all
+        other values are shared.  Those must be immutable - coming from our sources, they are strings, numbers,
+        dates and the like.  Dict keys are interned along the way.
+        """
+        if isinstance(value, dict):
+            return {
+                intern_string(key): Tell._copy_data(item) for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [Tell._copy_data(item) for item in value]
+        if isinstance(value, set):
+            # Anything in a set is hashable, so immutable enough to share
+            return set(value)
+        return value
+
     def _update_data_from_source(self, source_id, data_dict, replace_data=False):
+        self._clear_cached_representations()
         if replace_data or source_id not in self._data:
-            self._data[source_id] = copy.deepcopy(data_dict)
+            self._data[intern_string(source_id)] = Tell._copy_data(data_dict)
         else:
-            self._data[source_id].update(data_dict)
+            self._data[source_id].update(
+                (intern_string(key), value) for key, value in data_dict.items()
+            )
 
     def update_from_dict_representation(
         self,
@@ -509,12 +599,68 @@ class Tell(Persistable):
 
         if replace_tags:
             # todo:  this is a hack until I can fix it so users only update user tags
-            self._tags.clear()
+            # Done directly, as the data update below is skipped if this source's data hasn't changed
+            self._update_tags(values_dict.get(Tell.TAGS, ""), replace_tags=True)
 
         self.update_data_from_source(
             source_id, values_dict, modified_by=modified_by, replace_data=replace_data
         )
 
+    def differs_from_staged(self, staged_tell):
+        """
+        :param staged_tell: a staged version of this Tell (e.g., one a Source built up in a transient Teller)
+        :return: True if merging the staged Tell into this one would change this Tell
+        """
+        return (
+            not staged_tell._categories <= self._categories
+            or not staged_tell._tags <= self._tags
+            or not staged_tell._groups <= self._groups
+            or any(
+                self._data.get(source_id) != data
+                for source_id, data in staged_tell._data.items()
+            )
+        )
+
+    def merge_staged(self, staged_tell, modified_by):
+        """
+        Merge a staged version of this Tell into it.  The staged categories, tags and groups are added, and the
+        staged data blocks replace this Tell's data blocks for the same sources.
+
+        :param staged_tell: a staged version of this Tell (e.g., one a Source built up in a transient Teller)
+        :param modified_by: who is this being modified by?
+        """
+        for category in staged_tell.categories:
+            if not self.in_category(category):
+                self.add_category(category)
+        self.add_tags(staged_tell._tags)
+        self._groups.update(staged_tell._groups)
+        for source_id, data in staged_tell._data.items():
+            self.update_data_from_source(
+                source_id, data, modified_by=modified_by, replace_data=True
+            )
+        self.modified(modified_by)
+
+    def modified(self, modified_by):
+        super().modified(modified_by)
+        self._clear_cached_representations()
+
+    def _clear_cached_representations(self):
+        """
+        Must be called by anything that changes the Tell, so its cached representations are rebuilt on next use.
+        """
+        _CACHED_REPRESENTATIONS.pop(self, None)
+
+    def _cached_representation(self, key, build_representation):
+        """
+        :param key: which representation of the Tell this is
+        :param build_representation: a function to build the representation if it is not already cached
+        :return: the cached representation for key, built if necessary.  Callers should not modify it.
+        """
+        representations = _CACHED_REPRESENTATIONS.setdefault(self, {})
+        if key not in representations:
+            representations[key] = build_representation()
+        return representations[key]
+
     def to_json_pickle(self):
         return jsonpickle.encode(self)
 
@@ -528,8 +674,26 @@ class Tell(Persistable):
         for tell_property in tell.__dict__:
             new_tell.__dict__[tell_property] = tell.__dict__[tell_property]
 
+        new_tell.audit_info.convert_legacy_timestamps()
+        new_tell._intern_strings()
         return new_tell
 
+    def _intern_strings(self):
+        """
+        Freshly loaded Tells each have their own copies of every string - swap in the interned ones.
+        """
+        self._data = {
+            intern_string(source_id): {
+                intern_string(key): value for key, value in source_data.items()
+            }
+            for source_id, source_data in self._data.items()
+        }
+        self._tags = SortedSet(intern_string(tag) for tag in self._tags)
+        self._categories = SortedSet(
+            intern_string(category) for category in self._categories
+        )
+        self._groups = SortedSet(intern_string(group) for group in self._groups)
+
     def go_json(self):
         return json.dumps({self._alias: self._go_url})
 
@@ -537,6 +701,7 @@ class Tell(Persistable):
         if value is None:
             try:
                 self._data[source_id].pop(Tell.TELLUS_INFO)
+                self._clear_cached_representations()
             except KeyError:
                 # This just means that we're clearing out some info that had never been set.
                 pass
@@ -571,6 +736,19 @@ class Tell(Persistable):
         return self.tell_dict(minimal=True)
 
     def tell_dict(self, additional_properties=None, *, minimal=False):
+        # Handed out as a copy - nested lists and dicts included - so callers can't change the cached one
+        dict_representation = Tell._copy_data(
+            self._cached_representation(
+                ("dict", minimal), lambda: self._build_tell_dict(minimal)
+            )
+        )
+
+        if additional_properties:
+            dict_representation.update(additional_properties)
+
+        return dict_representation
+
+    def _build_tell_dict(self, minimal):
         dict_representation = self._properties_dict()
         tellus_info = self.tellus_info()
         if tellus_info:
@@ -587,19 +765,31 @@ class Tell(Persistable):
                 }
             )
 
-        if additional_properties:
-            dict_representation.update(additional_properties)
-
         return dict_representation
 
+    def minimal_json(self):
+        """
+        :return: the (cached) minimal simple JSON for the Tell - e.g., for assembling query responses.
+        """
+        return self.to_simple_json(minimal=True)
+
     def to_simple_json(self, additional_properties=None, *, minimal=False):
         """
         :param additional_properties: Any additional properties to decorate the dict with (e.g., User Info).
         :param minimal: If True, will return just the basic properties of the Tell
         :return: the simple JSON for the Tell
         """
-        json_dict = self.tell_dict(additional_properties, minimal=minimal)
+        if additional_properties:
+            return self._encode_simple_json(
+                self.tell_dict(additional_properties, minimal=minimal)
+            )
+
+        return self._cached_representation(
+            ("json", minimal),
+            lambda: self._encode_simple_json(self.tell_dict(minimal=minimal)),
+        )
 
+    def _encode_simple_json(self, json_dict):
         try:
             return json.dumps(json_dict)
         except TypeError as error:
@@ -33,6 +33,20 @@ class TheresNoTellingException(TellusException):
         )
 
 
+class TellerDiff:
+    """
+    The differences between a set of staged Tells and the live Tells in a Teller, by alias.
+    """
+
+    def __init__(self):
+        self.created = []
+        self.changed = []
+        self.unchanged = []
+
+    def __str__(self):
+        return f"{len(self.created)} created / {len(self.changed)} changed / {len(self.unchanged)} unchanged"
+
+
 # Manages our Tells
 class Teller(object):
     NEW_ALIAS = "new_alias"
@@ -267,6 +281,39 @@ class Teller(object):
         self._tells.__delitem__(tell.alias)
         return tell
 
+    def diff_staged_tells(self, staged_teller):
+        """
+        :param staged_teller: a (transient) Teller holding staged versions of Tells
+        :return: a TellerDiff of which staged Tells would be created, changed, or left unchanged in this Teller
+        """
+        diff = TellerDiff()
+        for staged_tell in staged_teller.tells():
+            live_tell = self._tells.get(staged_tell.alias)
+            if live_tell is None:
+                diff.created.append(staged_tell.alias)
+            elif live_tell.differs_from_staged(staged_tell):
+                diff.changed.append(staged_tell.alias)
+            else:
+                diff.unchanged.append(staged_tell.alias)
+        return diff
+
+    def apply_staged_tells(self, staged_teller, modified_by):
+        """
+        Apply a set of staged Tells to this Teller, touching only the Tells that would actually change.
+
+        This deliberately never yields to the event loop, so nothing can see a partially applied set of changes.
+
+        :param staged_teller: a (transient) Teller holding staged versions of Tells
+        :param modified_by: who is this being modified by?
+        :return: the TellerDiff that was applied
+        """
+        diff = self.diff_staged_tells(staged_teller)
+        for alias in diff.created:
+            self._tells[alias] = staged_teller.get(alias)
+        for alias in diff.changed:
+            self._tells[alias].merge_staged(staged_teller.get(alias), modified_by)
+        return diff
+
     def toggle_tag(self, alias, tag):
         """
         :param alias:  The alias of the Tell to toggle the tag on
@@ -136,7 +136,11 @@ class TellsHandler(object):
             )
 
     def query_tells(self, request):
-        return web.json_response(self.query_for(request))
+        return web.json_response(
+            text=self._json_from_fragments(
+                self.query_for(request, Tell.minimal_json.__name__)
+            )
+        )
 
     def query_links(self, request):
         return web.json_response(self.query_for(request, "go_url"))
@@ -157,12 +161,33 @@ class TellsHandler(object):
             search_string = request.match_info[self.PARAM_SEARCH_STRING]
         except KeyError:
             return web.json_response(
-                self._all_displayable_tells(Tell.minimal_tell_dict.__name__)
+                text=self._json_from_fragments(
+                    self._all_displayable_tells(Tell.minimal_json.__name__)
+                )
             )
 
         search_tells = self._teller.search_tells(search_string)
         return web.json_response(
-            {tell.alias: tell.minimal_tell_dict() for tell in search_tells}
+            text=self._json_from_fragments(
+                {tell.alias: tell.minimal_json() for tell in search_tells}
+            )
+        )
+
+    @staticmethod
+    def _json_from_fragments(json_fragments):
+        """
+        Assemble a json object from already-encoded json values, so the (cached) json for each Tell is reused as is.
+
+        :param json_fragments: a dict of key: <json-encoded string>
+        :return: the json for the whole dict
+        """
+        return (
+            "{"
+            + ", ".join(
+                f"{json.dumps(key)}: {fragment}"
+                for key, fragment in json_fragments.items()
+            )
+            + "}"
         )
 
     def all_go_links(self, _=None):
@@ -29,12 +29,12 @@ class ConfluenceSource(Source):
 
     async def load_source(self):
         new_teller = Source.create_transient_teller()
-        self._pages_retrieved = len(self.load_all_pages(new_teller))
+        self._pages_retrieved = len(await self.load_all_pages(new_teller))
         self._confluence_tells = (
             new_teller  # Note we are wholly swapping out the Teller each time
         )
 
-    def load_all_pages(self, new_teller, space="AQ"):
+    async def load_all_pages(self, new_teller, space="AQ"):
         start_page = 0
         pages_to_retrieve = 200
         max_pages = 5000  # Just a guard rail
@@ -42,8 +42,11 @@ class ConfluenceSource(Source):
         page_names = SortedSet()
 
         while more_pages:
-            pages = self._confluence.get_all_pages_from_space(
-                space, start=start_page, limit=pages_to_retrieve
+            pages = await self.run_blocking(
+                self._confluence.get_all_pages_from_space,
+                space,
+                start=start_page,
+                limit=pages_to_retrieve,
             )
             logging.debug("%s pages returned", len(pages))
             for page in pages:
@@ -1,10 +1,17 @@
+import hashlib
+import hmac
 import logging
+from urllib.parse import quote
 
+import aiohttp
 import requests
 from github import Github, GithubException
 from sortedcontainers import SortedSet
 
 from tellus.configuration import GITHUB_ACCESS_TOKEN, GITHUB_API_URL
+from tellus.tellus_utils import http_session
+
+DOWNLOAD_TIMEOUT_SECONDS = 30
 
 
 def gethub():
@@ -20,6 +27,51 @@ def download_github_file(file_url, access_token=GITHUB_ACCESS_TOKEN):
     return request.text
 
 
+async def fetch_github_file(file_url, access_token=GITHUB_ACCESS_TOKEN):
+    """
+    Download a file like download_github_file, but without blocking, over Tellus' shared (kept-alive) connections.
+    :raises aiohttp.ClientError: if the file could not be retrieved
+    """
+    async with http_session().get(
+        file_url,
+        headers={
+            "Authorization": f"token {access_token}",
+            "Accept": "application/vnd.github.v3.raw",  # For API URLs, rather than the JSON description
+        },
+        timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT_SECONDS),
+    ) as response:
+        response.raise_for_status()
+        return await response.text()
+
+
+def github_file_url(repo_name, path, ref):
+    """
+    :return: the API URL to download a file from a repo, as of a particular ref (e.g., a commit sha)
+    """
+    return f"{GITHUB_API_URL}/repos/{repo_name}/contents/{quote(path)}?ref={ref}"
+
+
+def git_blob_sha(content):
+    """
+    :return: the sha git (and so Github) gives a file with this content
+    """
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def verify_github_signature(secret, body, signature):
+    """
+    :param secret: the secret the Github webhook was set up with
+    :param body: the raw body of the webhook request
+    :param signature: the request's X-Hub-Signature-256 header
+    :return: True if Github signed the body with our secret
+    """
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
 def verify_github_user_validity(github_user):
     if github_user.name is None or github_user.suspended_at is not None:
         logging.info(
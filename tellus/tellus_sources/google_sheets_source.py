@@ -1,4 +1,9 @@
-from tellus.google_api_utils import get_spreadsheet_by_url
+from collections import Counter
+
+from gspread.exceptions import APIError, GSpreadException
+from gspread.utils import numericise
+
+from tellus.google_api_utils import get_spreadsheet_by_url, retrieve_tab_values
 from tellus.sources import Source
 from tellus.tell import Tell, TellWrapper, InvalidAliasException
 from tellus.tells import Teller
@@ -7,6 +12,7 @@ from tellus.configuration import (
     TELLUS_SHEET_SPEC,
     TELLUS_SOURCED,
 )
+import numpy as np
 import pandas as pd
 
 from tellus.tellus_utils import TellusException
@@ -31,6 +37,7 @@ class Sheet(TellWrapper):
 
     _CONFIG_SHEET = "tellus-sheet-config"
     _CONFIG_COLUMNS = ["Sheet", "Column", "TellusProperty", "TellusType"]
+    _RETRIEVED_TABS = "retrieved-tabs"
 
     INVALID_RECORD = "record"
     INVALID_ERROR = "error"
@@ -45,9 +52,14 @@ class Sheet(TellWrapper):
 
         return sheet
 
-    def __init__(self, sheet_tell):
+    def __init__(self, sheet_tell, gspread_client=None):
+        """
+        :param sheet_tell: the Tell for the sheet
+        :param gspread_client: Mostly to allow for easy mocking - if None, will use the real (shared) gspread client
+        """
         super().__init__(sheet_tell, "Sheet", GoogleSheetsSource.SOURCE_ID)
 
+        self._gspread_client = gspread_client
         self._spreadsheet = None
 
     @property
@@ -60,18 +72,57 @@ class Sheet(TellWrapper):
         Create the google sheet representation for us - lazily loaded, will cache it after the first retrieval.
         """
         if self._spreadsheet is None:
-            self._spreadsheet = get_spreadsheet_by_url(self.sheet_url)
+            self._spreadsheet = get_spreadsheet_by_url(
+                self.sheet_url, self._gspread_client
+            )
         return self._spreadsheet
 
-    def _retrieve_records_for_tab(self, sheet_tab):
-        tab = self._gsheet.worksheet(sheet_tab)
-        return tab.get_all_records()
+    def _retrieve_tab_dfs(self, sheet_tabs):
+        """
+        Retrieve several tabs at once, in a single request.
+
+        :return: a map of tab name to a Pandas Dataframe of the tab's records
+        """
+        return {
+            tab_name: Sheet.records_df(values)
+            for tab_name, values in retrieve_tab_values(
+                self._gsheet, sheet_tabs
+            ).items()
+        }
+
+    @staticmethod
+    def records_df(values):
+        """
+        Turn the values of a tab into a Pandas Dataframe of its records, just as gspread's get_all_records would:
+        the first row is the header, missing cells are blank, and anything that looks like a number is one.
+
+        :raises GSpreadException: if two columns have the same name, as get_all_records would
+        """
+        if len(values) == 0:
+            return pd.DataFrame()
+
+        header, rows = values[0], values[1:]
+        # Blank spacer columns are fine (nothing can be configured for them), but two columns of the same name are not
+        duplicates = [
+            name for name, count in Counter(header).items() if name and count > 1
+        ]
+        if duplicates:
+            raise GSpreadException(
+                f"the header row in the worksheet contains duplicates: {duplicates}"
+            )
+
+        columns = {}
+        for position, column_name in enumerate(header):
+            columns[column_name] = [
+                numericise(row[position]) if position < len(row) else "" for row in rows
+            ]
+        return pd.DataFrame(columns)
 
     def retrieve_sheet_config(self):
         """
         :return: a Pandas Dataframe of the config sheet.
         """
-        return self._retrieve_records_for_tab(Sheet._CONFIG_SHEET)
+        return self._retrieve_tab_dfs([Sheet._CONFIG_SHEET])[Sheet._CONFIG_SHEET]
 
     @staticmethod
     def tab_config(tab, config_df):
@@ -81,17 +132,56 @@ class Sheet(TellWrapper):
         """
         The main loading method for the Sheet.  Loads all data from the Google Sheet into the specified Teller.
         """
-        config_df = pd.DataFrame(self.retrieve_sheet_config())
-        tab_dfs = {}
-        specified_tabs = config_df.Sheet.unique()
-        for tab_name in specified_tabs:
-            if specific_tab is None or tab_name == specific_tab:
-                tab_dfs[tab_name] = pd.DataFrame(
-                    self._retrieve_records_for_tab(tab_name)
-                )
-
+        config_df, tab_dfs = self.retrieve_tabs(specific_tab)
+        if specific_tab is None:
+            self.remember_retrieved_tabs(tab_dfs)
         return self.load_all_tabs(teller, tab_dfs, config_df, self._tell.alias)
 
+    def retrieve_tabs(self, specific_tab=None):
+        """
+        Retrieve the config and tab data from the Google Sheet (the blocking part of a load).
+
+        Usually this is a single request, as we ask for the config along with the tabs it specified last time -
+        we only need to go back for any tabs that have been added to the config since.
+
+        :return: the config dataframe, and a map of tab name to the dataframe for each tab to load
+        """
+        if specific_tab is None:
+            expected_tabs = self.datum(Sheet._RETRIEVED_TABS) or []
+        else:
+            expected_tabs = [specific_tab]
+
+        try:
+            tab_dfs = self._retrieve_tab_dfs([Sheet._CONFIG_SHEET] + expected_tabs)
+        except APIError:
+            if len(expected_tabs) == 0:
+                raise
+            # Most likely one of the tabs we expected is gone, so let the config tell us what there is now
+            tab_dfs = self._retrieve_tab_dfs([Sheet._CONFIG_SHEET])
+
+        config_df = tab_dfs.pop(Sheet._CONFIG_SHEET)
+        specified_tabs = [
+            tab_name
+            for tab_name in config_df.Sheet.unique()
+            if specific_tab is None or tab_name == specific_tab
+        ]
+        missing_tabs = [tab for tab in specified_tabs if tab not in tab_dfs]
+        if len(missing_tabs) > 0:
+            tab_dfs.update(self._retrieve_tab_dfs(missing_tabs))
+
+        return config_df, {tab_name: tab_dfs[tab_name] for tab_name in specified_tabs}
+
+    def remember_retrieved_tabs(self, tab_dfs):
+        """
+        Remember which tabs a full retrieval found, so the next one can ask for them along with the config.
+        This updates the Sheet's Tell, so call it back on the event loop rather than alongside retrieve_tabs.
+
+        :param tab_dfs: the map of tab name to dataframe retrieve_tabs returned
+        """
+        tab_names = list(tab_dfs)
+        if tab_names != (self.datum(Sheet._RETRIEVED_TABS) or []):
+            self.set_datum(Sheet._RETRIEVED_TABS, tab_names)
+
     def load_all_tabs(self, teller, tab_dfs, config_df, source_id):
         all_tab_invalid_records = {}
 
@@ -108,20 +198,27 @@ class Sheet(TellWrapper):
     @staticmethod
     def load_tab(teller, tab_name, tab_df, tab_config_df, source_id):
         parser = SheetParser(tab_config_df)
+        tell_dicts, parse_errors = parser.parse_tab(tab_df, tab_name)
         invalid_records = []
 
-        for index, tell_row in tab_df.iterrows():
-            try:
-                tell_dict = parser.parse(tell_row, tab_name)
-                if Tell.ALIAS not in tell_dict.keys():
-                    # Mostly to ensure a more useful exception.
-                    raise InvalidAliasException(
-                        "[No Alias]", "No alias was parsed from this record."
-                    )
-                teller.create_tell_from_dict(TELLUS_SOURCED, tell_dict, source_id)
-            except Exception as e:
+        for row, (tell_dict, error) in enumerate(zip(tell_dicts, parse_errors)):
+            if error is None:
+                try:
+                    if Tell.ALIAS not in tell_dict.keys():
+                        # Mostly to ensure a more useful exception.
+                        raise InvalidAliasException(
+                            "[No Alias]", "No alias was parsed from this record."
+                        )
+                    teller.create_tell_from_dict(TELLUS_SOURCED, tell_dict, source_id)
+                except Exception as e:
+                    error = e
+
+            if error is not None:
                 invalid_records.append(
-                    {Sheet.INVALID_RECORD: tell_row.to_dict(), Sheet.INVALID_ERROR: e}
+                    {
+                        Sheet.INVALID_RECORD: tab_df.iloc[row].to_dict(),
+                        Sheet.INVALID_ERROR: error,
+                    }
                 )
 
         return invalid_records
@@ -149,6 +246,19 @@ class SheetParser:
         self._all_data = (
             SheetParser._ONLY_SPECIFIED not in config_columns_df.TellusType.unique()
         )
+        self._property_specs = SheetParser._compile_property_specs(self._config_df)
+
+    @staticmethod
+    def _compile_property_specs(config_df):
+        """
+        :return: a map of each configured column to the Tellus properties it is specified for, in config order
+        """
+        property_specs = {}
+        for column_name, tell_property in zip(
+            config_df.index, config_df.TellusProperty
+        ):
+            property_specs.setdefault(column_name, []).append(tell_property)
+        return property_specs
 
     @property
     def should_load_all_data(self):
@@ -167,27 +277,14 @@ class SheetParser:
         """
         tell_dict = {}
 
-        for cell in row_series.iteritems():
-            column_name = cell[0]
-            cell_value = cell[1]
-
+        for column_name, cell_value in row_series.items():
             if SheetParser._valid_value(cell_value):
                 # todo: suppress if not all data
                 datum_name = f"{tab_name}{SheetParser._SEPARATOR}{column_name}"
                 tell_dict[datum_name] = cell_value
 
-                try:
-                    property_specs = self._config_df.loc[[column_name]].to_dict(
-                        "records"
-                    )
-                except KeyError:
-                    property_specs = (
-                        []
-                    )  # We'll ignore everything else, if we don't have a specific spec
-
-                for property_spec in property_specs:
-                    tell_property = property_spec["TellusProperty"]
-
+                # We'll ignore everything else, if we don't have a specific spec
+                for tell_property in self._property_specs.get(column_name, []):
                     # todo: check is a property, handle go-url junk
 
                     if (
@@ -206,6 +303,77 @@ class SheetParser:
 
         return tell_dict
 
+    def parse_tab(self, tab_df, tab_name):
+        """
+        Parse a whole tab at once.  Follows exactly the same rules as `parse`, but works through the tab a column
+        at a time rather than a row at a time, which is a great deal faster for big sheets.
+
+        :param tab_df: the dataframe of the tab's data
+        :param tab_name: the name of the tab
+        :return: a list with the Tell dict for each row, and a list with the exception (if any) that made each row
+            invalid - in which case its Tell dict should be ignored
+        """
+        row_count = len(tab_df)
+        tell_dicts = [{} for _ in range(row_count)]
+        parse_errors = [None] * row_count
+        properties_found = {}  # Which rows already have a value for each property
+
+        for column_name in tab_df.columns:
+            column = tab_df[column_name]
+            valid = SheetParser._valid_values(column)
+            values = column.to_numpy(dtype=object)
+
+            datum_name = f"{tab_name}{SheetParser._SEPARATOR}{column_name}"
+            SheetParser._assign(tell_dicts, datum_name, values, valid)
+
+            for tell_property in self._property_specs.get(column_name, []):
+                if tell_property == Tell.ALIAS:  # Aliases are always a little special
+                    values, alias_errors = SheetParser._clean_aliases(values, valid)
+                    for row, error in alias_errors.items():
+                        parse_errors[row] = parse_errors[row] or error
+                        valid[row] = False
+
+                found = properties_found.get(tell_property, np.zeros(row_count, bool))
+                SheetParser._assign(tell_dicts, tell_property, values, valid & ~found)
+                SheetParser._assign(
+                    tell_dicts,
+                    SheetParser.duplicate_key(tell_property, column_name),
+                    values,
+                    valid & found,
+                )
+                properties_found[tell_property] = found | valid
+
+        return tell_dicts, parse_errors
+
+    @staticmethod
+    def _valid_values(column):
+        """
+        The vectorized version of `_valid_value`, for a whole column at once.
+
+        :return: a boolean numpy array of which cells in the column are valid
+        """
+        return (~pd.isna(column) & (column != "")).to_numpy(dtype=bool, copy=True)
+
+    @staticmethod
+    def _clean_aliases(values, valid):
+        """
+        :return: a copy of values with the valid ones cleaned up as aliases, and a map of row to the exception
+            for any that can't be
+        """
+        cleaned = values.copy()
+        alias_errors = {}
+        for row in np.flatnonzero(valid):
+            try:
+                cleaned[row] = Tell.clean_alias(values[row])
+            except Exception as e:
+                alias_errors[row] = e
+        return cleaned, alias_errors
+
+    @staticmethod
+    def _assign(tell_dicts, key, values, rows):
+        for row in np.flatnonzero(rows):
+            tell_dicts[row][key] = values[row]
+
     @staticmethod
     def _valid_value(cell_value):
         """
@@ -230,7 +398,9 @@ class GoogleSheetsSource(Source):
     async def load_source(self):
         sheets = self.get_sheets()
         for sheet in sheets:
-            sheet.load_from_google_sheet(self.teller, self.source_id)
+            config_df, tab_dfs = await self.run_blocking(sheet.retrieve_tabs)
+            sheet.remember_retrieved_tabs(tab_dfs)
+            sheet.load_all_tabs(self.teller, tab_dfs, config_df, sheet.alias)
 
     @staticmethod
     def construct_tells(sheet, records, teller):
@@ -7,6 +7,7 @@ from tellus.sources import Source
 from tellus.configuration import TELLUS_PREFIX, TELLUS_INTERNAL, TELLUS_USER_MODIFIED
 from tellus.tells import TheresNoTellingException
 from tellus.tellus_utils import now_string, datetime_from_string, now
+from tellus.wiring import DATA_USER_INFO
 
 
 class Socializer(Source):
@@ -21,6 +22,9 @@ class Socializer(Source):
             user_manager.teller,
             source_id=self.SOURCE_ID,
             description="Manages Setting up coffees, lunches, etc.",
+            dependencies=[DATA_USER_INFO],  # Needs UserInfo to have updated the Users
+            # Coffee Bot only pairs people on Sundays - every 6 hours is often enough to catch each one
+            period=6 * 3600,
         )
         self._user_manager = user_manager
 
@@ -28,7 +32,7 @@ class Socializer(Source):
         if self.should_generate_new_coffee_schedule():
             self.make_coffee_schedule()
             pairings = self.lock_in_coffee_schedule()
-            self.teller.persist()
+            self.persist()
             message = f"Coffee Bot ran successfully.  Pairings: {pairings}"
         else:
             if self.coffee_bot().paused:
@@ -28,6 +28,7 @@ class TellusInitialization(Source):
     once on startup, and should only run migrations with particular versions of Tellus, etc.
     """
 
+    SOURCE_ID = "data-migration"
     TELLUS_ABOUT_DESCRIPTION = "About Tellus."
 
     def __init__(self, teller, active_migrations=None):
@@ -37,7 +38,7 @@ class TellusInitialization(Source):
         """
         super().__init__(
             teller,
-            source_id="data-migration",
+            source_id=TellusInitialization.SOURCE_ID,
             description="A special source for managing and migrating Tellus data between versions.",
             datum_display_name="Data Migration",
             run_restriction=Source.RUN_ON_STARTUP,
@@ -86,7 +87,7 @@ class TellusInitialization(Source):
         should_persist = self.verify_or_create_about_tell() or should_persist
 
         if should_persist:
-            self.teller.persist()
+            self.persist()
 
     async def _run_migrations(self):
         if len(self._active_migrations) == 0:
@@ -110,7 +111,7 @@ class TellusInitialization(Source):
                 logging.info("%s complete.", migration_name)
                 self._migrations_run += 1
 
-        self.teller.persist()
+        self.persist()
 
         logging.info(
             "Migrations complete - have run %s of %s migrations since startup.",
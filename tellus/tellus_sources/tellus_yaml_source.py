@@ -1,24 +1,66 @@
+import asyncio
+import json
 import logging
+import posixpath
 
 import yaml
+from aiohttp import web
 
 from tellus.configuration import (
     GITHUB_URL,
+    GITHUB_WEBHOOK_SECRET,
     TELLUS_PREFIX,
     TELLUS_INTERNAL,
     TELLUS_TOOL,
     TELLUS_TOOL_RELATED,
 )
-from tellus.tellus_sources.github_helper import download_github_file, gethub
+from tellus.tellus_sources.github_helper import (
+    fetch_github_file,
+    gethub,
+    github_file_url,
+    git_blob_sha,
+    verify_github_signature,
+)
 from tellus.sources import Source
+from tellus.tellus_sources.tellus_initialization_source import TellusInitialization
 from tellus.tell import Tell
 from tellus.tellus_utils import TellusException
+from tellus.wiring import R_UNSECURE
+
+try:
+    # libyaml's loader is many times faster than the pure Python one
+    from yaml import CSafeLoader as TellusYAMLLoader
+except ImportError:
+    from yaml import SafeLoader as TellusYAMLLoader
 
 GITHUB_REPO_DATUM = "github-repo"
 
 TELLUS_CONFIG_TOOLS = TELLUS_PREFIX + "config-tools"
 
 
+def parse_tellus_yml(tellus_yml):
+    """
+    :return: the documents in a tellus.yml file, as plain dicts
+    """
+    return list(yaml.load_all(tellus_yml, Loader=TellusYAMLLoader))
+
+
+def parse_tellus_ymls(tellus_ymls):
+    """
+    Parse a batch of tellus.yml files - meant to be run in the source process pool.
+
+    :return: the documents for each file, or None for any that couldn't be parsed
+    """
+    parsed = []
+    for tellus_yml in tellus_ymls:
+        try:
+            parsed.append(parse_tellus_yml(tellus_yml))
+        # pylint: disable=broad-except
+        except Exception:
+            parsed.append(None)  # Parsed again when staged, for the full error
+    return parsed
+
+
 class TellusYMLSource(Source):
     SOURCE_ID = TELLUS_TOOL
     VALID_TELLUS_FILE_NAMES = [
@@ -28,25 +70,53 @@ class TellusYMLSource(Source):
         ".tellus.yaml",
     ]
     IGNORE_MARKER = "tellus-ignore"
+    DOWNLOAD_CONCURRENCY = 10
+    PARSE_BATCH_SIZE = 25
+    FILE_SHAS_CHECKPOINT = "tellus-file-shas"
+    # If Github tells us about pushes, full scans are just to catch anything it didn't
+    RECONCILIATION_PERIOD = 6 * 3600
 
-    def __init__(self, teller):
+    def __init__(self, teller, webhooks_enabled=False):
+        """
+        :param teller: the Teller to load tellus.yml files into
+        :param webhooks_enabled: whether Github is sending us pushes (see GithubPushHandler)
+        """
         super().__init__(
-            teller, source_id=TellusYMLSource.SOURCE_ID, description="tellus.yml files"
+            teller,
+            source_id=TellusYMLSource.SOURCE_ID,
+            description="tellus.yml files",
+            dependencies=[TellusInitialization.SOURCE_ID],
+            # tellus.yml files change often, and are cheap to check
+            period=TellusYMLSource.RECONCILIATION_PERIOD if webhooks_enabled else 300,
         )
         self._tool_config = None  # This guy is lazy loaded..
+        self._files_lock = None  # So full scans and pushes don't step on each other
 
-    def _handle_secondary_yml_tell(self, yml_dict, repo_path_name, primary_tell):
+    def _handle_secondary_yml_tell(
+        self, staging_teller, yml_dict, repo_path_name, primary_tell
+    ):
         alias = yml_dict[Tell.ALIAS]
         if alias.startswith("-"):
             alias = primary_tell.alias + alias
             yml_dict[Tell.ALIAS] = alias
 
         return self._handle_yml_tell(
-            alias, yml_dict, repo_path_name, TELLUS_TOOL_RELATED, primary_tell
+            staging_teller,
+            alias,
+            yml_dict,
+            repo_path_name,
+            TELLUS_TOOL_RELATED,
+            primary_tell,
         )
 
     def _handle_yml_tell(
-        self, alias, yml_dict, repo_path_name, category, primary_tell=None
+        self,
+        staging_teller,
+        alias,
+        yml_dict,
+        repo_path_name,
+        category,
+        primary_tell=None,
     ):
         if yml_dict.get(self.IGNORE_MARKER):
             logging.info(
@@ -55,7 +125,7 @@ class TellusYMLSource(Source):
             )
             return None
 
-        tell = self.teller.get_or_create_tell(
+        tell = staging_teller.get_or_create_tell(
             raw_alias=alias, category=category, created_by=self.source_id
         )
         tell.update_from_dict_representation(
@@ -73,8 +143,6 @@ class TellusYMLSource(Source):
         repo_url = f"{GITHUB_URL}/{repo_path_name}"
         self.update_from_source(tell, GITHUB_REPO_DATUM, repo_url)
 
-        self._check_tool_keywords(tell)
-
         return tell
 
     def _check_tool_keywords(self, tell):
@@ -92,15 +160,49 @@ class TellusYMLSource(Source):
 
     def parse_tellus_file(self, tellus_yml, repo_name, file_url):
         """
+        Parse a single tellus.yml file, and apply the results to the Teller.
+
         :param tellus_yml:  the file to parse
         :param repo_name: the name of the github repo it came from
         :param file_url: the download URL of the file
         :return: True if parsing was wholly successful, False otherwise (mostly for testing)
         """
+        staging_teller = self.create_transient_teller()
+        parsed = self.stage_tellus_file(staging_teller, tellus_yml, repo_name, file_url)
+        self.apply_staged_tells(staging_teller)
+        for staged_tell in staging_teller.tells():
+            self._check_tool_keywords(self.teller.get(staged_tell.alias))
+        return parsed
+
+    def _check_all_tool_keywords(self):
+        """
+        Check the tool keywords of every Tell from a tellus.yml file - not just those from files that changed, as
+        the tool config may have.
+        """
+        if self.tool_config().is_disabled():
+            return
+
+        for tell in self.teller.tells():
+            if tell.get_data(self.source_id) is not None:
+                self._check_tool_keywords(tell)
+
+    def stage_tellus_file(
+        self, staging_teller, tellus_yml, repo_name, file_url, documents=None
+    ):
+        """
+        :param staging_teller: the transient Teller to build the Tells from this file in
+        :param tellus_yml:  the file to parse
+        :param repo_name: the name of the github repo it came from
+        :param file_url: the download URL of the file
+        :param documents: the file's documents, if it has already been parsed
+        :return: True if parsing was wholly successful, False otherwise
+        """
         logging.info("Parsing: %s", file_url)
         current_yml = tellus_yml  # So in case of exception we see the whole file
         try:
-            primary_yml, *related = yaml.load_all(tellus_yml, Loader=yaml.FullLoader)
+            if documents is None:
+                documents = parse_tellus_yml(tellus_yml)
+            primary_yml, *related = documents
             if primary_yml.get(self.IGNORE_MARKER):
                 logging.info(
                     "Tellus yaml file at [%s] is marked to be ignored with %s.  Doing that.",
@@ -111,19 +213,23 @@ class TellusYMLSource(Source):
 
             current_yml = primary_yml  # In case of an exception
             primary_tell = self._handle_yml_tell(
-                primary_yml[Tell.ALIAS], primary_yml, repo_name, TELLUS_TOOL
+                staging_teller,
+                primary_yml[Tell.ALIAS],
+                primary_yml,
+                repo_name,
+                TELLUS_TOOL,
             )
             aliases = [primary_tell.alias]
 
             for current_yml in related:
                 secondary = self._handle_secondary_yml_tell(
-                    current_yml, repo_name, primary_tell
+                    staging_teller, current_yml, repo_name, primary_tell
                 )
                 if secondary:
                     aliases.append(secondary.alias)
 
             logging.info(
-                "Loaded tellus.yml for %s.  Tells added/updated: %s",
+                "Staged tellus.yml for %s.  Tells staged: %s",
                 primary_tell.alias,
                 repr(aliases),
             )
@@ -181,28 +287,293 @@ class TellusYMLSource(Source):
     def is_tellus_file(github_file):
         return github_file.name in TellusYMLSource.VALID_TELLUS_FILE_NAMES
 
+    @staticmethod
+    def find_tellus_files(github):
+        """
+        Runs the search and pages through all of its results, which makes blocking calls to Github.
+
+        :return: the total count of files found, and a list of (repo name, path, blob sha, download url) for each
+            tellus file
+        """
+        found_files = TellusYMLSource.query_for_files(github)
+        tellus_files = [
+            (
+                github_file.repository.full_name,
+                github_file.path,
+                github_file.sha,
+                github_file.download_url,
+            )
+            for github_file in found_files
+            if TellusYMLSource.is_tellus_file(github_file)
+        ]
+        return found_files.totalCount, tellus_files
+
+    async def _download_tellus_file(self, download_limit, download_url):
+        async with download_limit:
+            tellus_yml = await fetch_github_file(download_url)
+        self.record_external_call(bytes_fetched=len(tellus_yml.encode("utf-8")))
+        return tellus_yml
+
+    def _lock_files(self):
+        if self._files_lock is None:
+            self._files_lock = asyncio.Lock()
+        return self._files_lock
+
+    async def load_pushed_files(self, repo_name, changed_paths, removed_paths, ref):
+        """
+        Re-parse just the tellus.yml files a push to Github changed.
+
+        :param repo_name: the full name of the repo pushed to
+        :param changed_paths: the paths of the tellus.yml files added or modified by the push
+        :param removed_paths: the paths of the tellus.yml files removed by the push
+        :param ref: the commit to get the files as of
+        :return: the number of files successfully parsed
+        """
+        async with self._lock_files():
+            file_shas = dict(self.checkpoint(TellusYMLSource.FILE_SHAS_CHECKPOINT, {}))
+            for path in removed_paths:
+                file_shas.pop(f"{repo_name}/{path}", None)
+
+            parsed = 0
+            for path in changed_paths:
+                file_url = github_file_url(repo_name, path, ref)
+                try:
+                    tellus_yml = await fetch_github_file(file_url)
+                # pylint: disable=broad-except
+                except Exception as exception:
+                    logging.error(
+                        "Unable to download pushed tellus.yml file '%s': %s",
+                        file_url,
+                        repr(exception),
+                    )
+                    continue
+                if self.parse_tellus_file(tellus_yml, repo_name, file_url):
+                    file_shas[f"{repo_name}/{path}"] = git_blob_sha(tellus_yml)
+                    parsed += 1
+
+            self.save_checkpoint(TellusYMLSource.FILE_SHAS_CHECKPOINT, file_shas)
+            self.persist()
+            return parsed
+
+    def _parse_tellus_files(self, tellus_files):
+        """
+        Start parsing a batch of downloaded files in the process pool.
+
+        :param tellus_files: (file key, sha, repo name, download url, tellus.yml) for each file
+        :return: a future for the documents of each file
+        """
+        return asyncio.ensure_future(
+            self.run_cpu_bound(
+                parse_tellus_ymls, [tellus_yml for *_, tellus_yml in tellus_files]
+            )
+        )
+
+    def _stage_tellus_files(self, staging_teller, tellus_files, parsed, file_shas):
+        """
+        Stage a parsed batch of files.
+
+        :param tellus_files: (file key, sha, repo name, download url, tellus.yml) for each file
+        :param parsed: the documents of each file, as parse_tellus_ymls gave them
+        :param file_shas: updated with the sha of each file successfully staged
+        """
+        for (file_key, sha, repo_name, download_url, tellus_yml), documents in zip(
+            tellus_files, parsed
+        ):
+            if self.stage_tellus_file(
+                staging_teller, tellus_yml, repo_name, download_url, documents
+            ):
+                file_shas[file_key] = sha  # Otherwise we'll try again next time
+
     async def load_source(self):
+        async with self._lock_files():
+            return await self._load_all_files()
+
+    async def _load_all_files(self):
         try:
             self.set_up_tools()
             logging.info("Retrieving and loading tellus.yml files...")
-            found_files = self.query_for_files(gethub())
-            logging.info("Found %d files.", found_files.totalCount)
-            for github_file in found_files:
-                if self.is_tellus_file(github_file):
-                    self.parse_tellus_file(
-                        download_github_file(github_file.download_url),
-                        github_file.repository.full_name,
-                        github_file.download_url,
+            total_count, tellus_files = await self.run_blocking(
+                self.find_tellus_files, gethub()
+            )
+            logging.info("Found %d files.", total_count)
+            staging_teller = self.create_transient_teller()
+
+            # Files whose contents (i.e., blob sha) are the same as last time don't need to be looked at again
+            last_shas = self.checkpoint(TellusYMLSource.FILE_SHAS_CHECKPOINT, {})
+            file_shas = {}
+            changed_files = []
+            for repo_name, path, sha, download_url in tellus_files:
+                file_key = f"{repo_name}/{path}"
+                if last_shas.get(file_key) == sha:
+                    file_shas[file_key] = sha
+                else:
+                    changed_files.append((file_key, sha, repo_name, download_url))
+            unchanged = len(tellus_files) - len(changed_files)
+
+            # Download them all (a few at a time), and parse them in batches as they arrive - several batches at
+            # once, in the process pool - then stage them all in order
+            download_limit = asyncio.Semaphore(TellusYMLSource.DOWNLOAD_CONCURRENCY)
+            downloads = [
+                asyncio.ensure_future(
+                    self._download_tellus_file(download_limit, download_url)
+                )
+                for *_, download_url in changed_files
+            ]
+            failed = 0
+            downloaded = []
+            batches = []
+            parsing = []
+            try:
+                for (file_key, sha, repo_name, download_url), download in zip(
+                    changed_files, downloads
+                ):
+                    try:
+                        tellus_yml = await download
+                    # Whatever went wrong with one file shouldn't stop us loading the rest
+                    # pylint: disable=broad-except
+                    except Exception as exception:
+                        logging.error(
+                            "Unable to download tellus.yml file '%s': %s",
+                            download_url,
+                            repr(exception),
+                        )
+                        failed += 1
+                        continue
+                    downloaded.append(
+                        (file_key, sha, repo_name, download_url, tellus_yml)
                     )
-
-            self.teller.persist()
-            message = f"Success! {found_files.totalCount} tellus.yaml files processed."
+                    if len(downloaded) >= TellusYMLSource.PARSE_BATCH_SIZE:
+                        batches.append(downloaded)
+                        parsing.append(self._parse_tellus_files(downloaded))
+                        downloaded = []
+                if downloaded:
+                    batches.append(downloaded)
+                    parsing.append(self._parse_tellus_files(downloaded))
+
+                for batch, parsed in zip(batches, await asyncio.gather(*parsing)):
+                    self._stage_tellus_files(staging_teller, batch, parsed, file_shas)
+            finally:
+                for future in downloads + parsing:
+                    future.cancel()
+
+            diff = self.apply_staged_tells(staging_teller)
+            self._check_all_tool_keywords()
+            if file_shas != last_shas:
+                self.save_checkpoint(TellusYMLSource.FILE_SHAS_CHECKPOINT, file_shas)
+            self.persist()
+            message = (
+                f"Success! {total_count} tellus.yaml files processed.  Tells: {diff}."
+            )
+            if unchanged:
+                message += f"  ({unchanged} files were unchanged.)"
+            if failed:
+                message += f"  ({failed} files could not be downloaded.)"
         except (ConnectionError, OSError) as exception:
             message = f"Unable to load tellus.yml files: {str(exception)}"
             logging.error(message)
         return message
 
 
+class GithubPushHandler:
+    """
+    Handles Github's push webhook, so changes to tellus.yml files show up right away, rather than on the
+    next full scan.
+    """
+
+    ROUTE = f"/{R_UNSECURE}/github-push"
+
+    def __init__(self, tellus_yml_source, secret=GITHUB_WEBHOOK_SECRET):
+        """
+        :param tellus_yml_source: the TellusYMLSource to re-parse the pushed files with
+        :param secret: the secret the Github webhook was set up with
+        """
+        self._source = tellus_yml_source
+        self._secret = secret
+        self._updates = set()
+
+    @staticmethod
+    def pushed_tellus_files(payload):
+        """
+        :param payload: a Github push event
+        :return: a sorted list of the tellus.yml paths the push added or modified, and one of those it removed
+        """
+        changed = set()
+        removed = set()
+        for commit in payload.get("commits", []):
+            for path in commit.get("added", []) + commit.get("modified", []):
+                changed.add(path)
+                removed.discard(path)
+            for path in commit.get("removed", []):
+                removed.add(path)
+                changed.discard(path)
+
+        def tellus_files(paths):
+            return sorted(
+                path
+                for path in paths
+                if posixpath.basename(path) in TellusYMLSource.VALID_TELLUS_FILE_NAMES
+            )
+
+        return tellus_files(changed), tellus_files(removed)
+
+    async def handle_push(self, request):
+        body = await request.read()
+        if not verify_github_signature(
+            self._secret, body, request.headers.get("X-Hub-Signature-256")
+        ):
+            logging.warning("Received a Github webhook with an invalid signature.")
+            return web.Response(text="Invalid signature.", status=401)
+
+        event = request.headers.get("X-GitHub-Event")
+        if event == "ping":
+            return web.Response(text="pong")
+        if event != "push":
+            return web.Response(text=f"Ignoring '{event}' event.")
+
+        try:
+            payload = json.loads(body)
+            repository = payload["repository"]
+            repo_name = repository["full_name"]
+            after = payload["after"]
+        except (ValueError, KeyError, TypeError):
+            return web.Response(text="Malformed push event.", status=400)
+
+        # Only the default branch is searched, so only it counts
+        if (
+            payload.get("deleted")
+            or payload.get("ref") != f"refs/heads/{repository.get('default_branch')}"
+        ):
+            return web.json_response({"repository": repo_name, "files": []})
+
+        changed, removed = GithubPushHandler.pushed_tellus_files(payload)
+        if changed or removed:
+            logging.info(
+                "Github push to %s changed tellus.yml files %s, removed %s.",
+                repo_name,
+                changed,
+                removed,
+            )
+            update = asyncio.ensure_future(
+                self._source.load_pushed_files(repo_name, changed, removed, after)
+            )
+            self._updates.add(update)
+            update.add_done_callback(self._updates.discard)
+
+        return web.json_response(
+            {"repository": repo_name, "files": changed}, status=202
+        )
+
+    async def wait_for_updates(self):
+        """
+        Wait for the files from any pushes received so far to be parsed (mostly for testing).
+        """
+        if self._updates:
+            await asyncio.gather(*self._updates)
+
+    def setup_routes(self, router):
+        router.add_post(GithubPushHandler.ROUTE, self.handle_push)
+
+
 class ToolConfig:
     """
     A wrapper around the Tool Config to make it more useful.
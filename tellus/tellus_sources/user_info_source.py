@@ -1,4 +1,9 @@
+import asyncio
+import hashlib
+import json
 import logging
+from collections import defaultdict
+from urllib.parse import urlparse
 
 from requests import RequestException
 
@@ -8,8 +13,9 @@ from tellus.tellus_sources.confluence_helper import (
     retrieve_valid_confluence_usernames,
 )
 from tellus.google_api_utils import retrieve_gsuite_user_directory
-from tellus.sources import Source
-from tellus.tellus_utils import is_url_available
+from tellus.sources import Source, BLOCKING_IO_THREADS
+from tellus.tellus_sources.tellus_initialization_source import TellusInitialization
+from tellus.tellus_utils import is_url_available, TTLCache
 from tellus.users import InvalidTellusUserException, User
 
 USERNAME = "|USERNAME|"
@@ -20,6 +26,13 @@ class UserInfo(Source):
     CONFLUENCE_PROFILE_DATA = "confluence-profile"
     GSUITE_PROFILE_DATA = "gsuite-profile"
     GSUITE_PRIMARY_PHONE = "mobile"
+    URL_CHECK_CONCURRENCY = 20
+    URL_CHECK_CONCURRENCY_PER_HOST = 5
+    # User pages come and go rarely, so don't re-check them every run
+    URL_CHECK_TTL = 3 * 24 * 3600
+    # The blocking I/O threads are shared by every source, so leave plenty of them for the others
+    PROFILE_FETCH_CONCURRENCY = max(1, BLOCKING_IO_THREADS // 4)
+    USER_FINGERPRINTS_CHECKPOINT = "user-fingerprints"
 
     """
     A source that constructs a representation of a particular Tellus Users's footprint.
@@ -35,19 +48,30 @@ class UserInfo(Source):
         "confluence": f"{CONFLUENCE_URL}/rest/mobile/1.0/profile/{USERNAME}",  # This one is required to get email
     }
 
-    def __init__(self, user_manager, confluence=None, gsuite_directory_function=None):
+    def __init__(
+        self,
+        user_manager,
+        confluence=None,
+        gsuite_directory_function=None,
+        avatar_cache=None,
+    ):
         """
         :param user_manager:  The User Manager for this Source to get/add user data.
         :param confluence: Mostly to allow for easy mocking - if None, will get the real Confluence wrapper
         :param gsuite_directory_function: Mostly to allow for easy mocking - if None, will use the real method
+        :param avatar_cache: the AvatarCache to keep users' avatars in - if None, avatars are linked from Confluence
         """
         super().__init__(
             user_manager.teller,
             source_id=UserInfo.SOURCE_ID,
             description="Connects a user Tell with various information about them from around the org.",
             datum_display_name="User Info",
+            dependencies=[TellusInitialization.SOURCE_ID],
+            period=24 * 3600,  # The org changes slowly, and the lookups are expensive
+            timeout=1800,  # Checks several systems for every user
         )
         self._user_manager = user_manager
+        self._avatar_cache = avatar_cache
         if confluence:
             self._confluence = confluence
         else:
@@ -58,20 +82,58 @@ class UserInfo(Source):
         else:
             self._gsuite_directory_function = retrieve_gsuite_user_directory
 
+        self._url_availability = TTLCache(UserInfo.URL_CHECK_TTL)
+        self._url_check_limit = None
+        self._host_url_check_limits = None
+        self._profile_fetch_limit = None
+
     @staticmethod
     def _confluence_url(url_path):
         return f"{CONFLUENCE_URL}{url_path}"
 
-    async def _update_available_user_urls(self, user):
-        available_urls = []
+    def _reset_concurrency_limits(self):
+        self._profile_fetch_limit = asyncio.Semaphore(
+            UserInfo.PROFILE_FETCH_CONCURRENCY
+        )
+        self._url_check_limit = asyncio.Semaphore(UserInfo.URL_CHECK_CONCURRENCY)
+        self._host_url_check_limits = defaultdict(
+            lambda: asyncio.Semaphore(UserInfo.URL_CHECK_CONCURRENCY_PER_HOST)
+        )
+
+    async def _is_user_url_available(self, url):
+        """
+        :return: whether the URL is available - checked at most a few at a time (per host and overall),
+            and only re-checked once the last result has expired
+        """
+        available = self._url_availability.get(url)
+        if available is None:
+            if self._url_check_limit is None:
+                self._reset_concurrency_limits()
+            host_limit = self._host_url_check_limits[urlparse(url).netloc]
+            async with self._url_check_limit, host_limit:
+                available = await is_url_available(url)
+            self._url_availability.put(url, available)
+        return available
+
+    async def _available_user_urls(self, user):
+        user_urls = [
+            (system, url.replace(USERNAME, user.username))
+            for system, url in UserInfo._user_urls
+        ]
+        availability = await asyncio.gather(
+            *[self._is_user_url_available(user_url) for _, user_url in user_urls]
+        )
 
-        for system, url in UserInfo._user_urls:
-            user_url = url.replace(USERNAME, user.username)
-            if await is_url_available(user_url):
+        available_urls = []
+        for (system, user_url), available in zip(user_urls, availability):
+            if available:
                 available_urls.append((system, user_url))
             else:
                 logging.debug("%s not available", user_url)
 
+        return available_urls
+
+    def _update_available_user_urls(self, user, available_urls):
         if len(available_urls) > 0:
             for system, url in available_urls:
                 self.update_from_source(user.tell, system, url)
@@ -82,17 +144,38 @@ class UserInfo(Source):
                     user.username,
                 )
 
-        return available_urls
-
-    def _populate_confluence_info(self, user):
+    async def _fetch_confluence_profile(self, user):
+        """
+        Fetch the user's Confluence profile - a few at a time, off the event loop.
+        :return: the profile, or None if it couldn't be retrieved
+        """
+        if self._profile_fetch_limit is None:
+            self._reset_concurrency_limits()
         try:
-            profile = self._confluence.get_mobile_parameters(
-                user.username
-            )  # ¯\_(ツ)_/¯ as far as I can determine, this is the only way to get email address
+            async with self._profile_fetch_limit:
+                return await self.run_blocking(
+                    self._confluence.get_mobile_parameters, user.username
+                )  # ¯\_(ツ)_/¯ as far as I can determine, this is the only way to get email address
         except RequestException as e:
             logging.warning("Error loading User Info from Confluence:  %s", e)
-            return
+            return None
 
+    async def _avatar_url(self, user, profile):
+        """
+        :return: the URL for the user's avatar - from the avatar cache if we have one - or None if there isn't one
+        """
+        if profile.get("avatarUrl") is None:
+            return None
+
+        avatar_url = f"{CONFLUENCE_URL}{profile.get('avatarUrl')}"
+        if self._avatar_cache is not None:
+            avatar_url = (
+                await self._avatar_cache.refresh(user.username, avatar_url)
+                or avatar_url
+            )
+        return avatar_url
+
+    def _populate_confluence_info(self, user, profile, avatar_url=None):
         user.tell.update_data_from_source(UserInfo.CONFLUENCE_PROFILE_DATA, profile)
         try:
             user.set_user_info(full_name=profile["fullName"], email=profile["email"])
@@ -101,13 +184,14 @@ class UserInfo(Source):
                 "Profile information did not contain either Full Name or Email: %s",
                 profile,
             )
-        if profile.get("avatarUrl") is not None:
-            user.set_user_info_property(
-                User.AVATAR_URL, f"{CONFLUENCE_URL}{profile.get('avatarUrl')}"
-            )
+        if avatar_url is not None:
+            user.set_user_info_property(User.AVATAR_URL, avatar_url)
         user.set_user_info_property(User.PHONE, profile.get("phone"))
 
     def populate_gsuite_info(self, user, users_data):
+        """
+        :return: whether the user now has all the GSuite information we could give them
+        """
         if user.email is None:
             logging.warning(
                 "User '%s' does not have an associated email prior to GSuite directory lookup. "
@@ -115,7 +199,7 @@ class UserInfo(Source):
                 "Please verify Confluence data for this user (or contact Help).",
                 user.username,
             )
-            return
+            return False
 
         gsuite_user = users_data.get(user.email)
         if gsuite_user is None:
@@ -126,7 +210,8 @@ class UserInfo(Source):
                 user.username,
                 user.email,
             )
-            return
+            # Nothing more this directory can tell us about them
+            return True
 
         try:
             # Note:  because we are using email as the key, we use the existing email here.
@@ -161,21 +246,76 @@ class UserInfo(Source):
                 user.username,
                 repr(e),
             )
+            return False
+
+        return True
+
+    @staticmethod
+    def _fingerprint(user_inputs):
+        return hashlib.sha256(
+            json.dumps(user_inputs, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def _has_user_info(user, gsuite_user):
+        """
+        :return: whether the user's Tell has the data a complete lookup would have given it
+        """
+        if user.tell.get_data(UserInfo.CONFLUENCE_PROFILE_DATA) is None:
+            return False
+        return (
+            gsuite_user is None
+            or user.tell.get_data(UserInfo.GSUITE_PROFILE_DATA) is not None
+        )
+
+    async def _load_user(self, user, gsuite_users, fingerprints):
+        """
+        Look the user up in each system, and update them - unless what we found is the same as last time.
+
+        :param fingerprints: the fingerprints of each user's lookups from the last run - updated for this user
+        :return: whether the user was "new" (no fingerprint), "changed" or "unchanged"
+        """
+        available_urls = await self._available_user_urls(user)
+        profile = await self._fetch_confluence_profile(user)
+        avatar_url = await self._avatar_url(user, profile) if profile else None
+        email = profile.get("email", user.email) if profile else user.email
+        fingerprint = UserInfo._fingerprint(
+            [available_urls, profile, avatar_url, gsuite_users.get(email)]
+        )
+
+        last_fingerprint = fingerprints.get(user.username)
+        # The fingerprints live on the source's Tell, so also make sure the user's own Tell still has what we
+        # gave it (it may have been deleted and recreated since)
+        if fingerprint == last_fingerprint and UserInfo._has_user_info(
+            user, gsuite_users.get(email)
+        ):
+            return "unchanged"
+
+        self._update_available_user_urls(user, available_urls)
+        if profile is not None:
+            self._populate_confluence_info(user, profile, avatar_url)
+        gsuite_complete = self.populate_gsuite_info(user, gsuite_users)
+
+        # Only remember lookups whose updates all went through, so a user is repaired next time otherwise
+        if profile is not None and gsuite_complete:
+            fingerprints[user.username] = fingerprint
+
+        return "new" if last_fingerprint is None else "changed"
 
     async def load_source(self):
         usernames = self._user_manager.update_valid_usernames(
-            retrieve_valid_confluence_usernames(self._confluence)
+            await self.run_blocking(
+                retrieve_valid_confluence_usernames, self._confluence
+            )
         )
 
-        gsuite_users = self._gsuite_directory_function()
+        gsuite_users = await self.run_blocking(self._gsuite_directory_function)
         logging.info("Retrieved %s GSuite Users from the directory.", len(gsuite_users))
 
+        users = []
         for username in usernames:
             try:
-                user = self._user_manager.get_or_create_valid_user(username)
-                await self._update_available_user_urls(user)
-                self._populate_confluence_info(user)
-                self.populate_gsuite_info(user, gsuite_users)
+                users.append(self._user_manager.get_or_create_valid_user(username))
             except InvalidTellusUserException as exception:
                 logging.warning(
                     "Attempted to get/create user for '%s', but received exception: %s",
@@ -183,5 +323,29 @@ class UserInfo(Source):
                     str(exception),
                 )
 
+        self._reset_concurrency_limits()
+        last_fingerprints = self.checkpoint(UserInfo.USER_FINGERPRINTS_CHECKPOINT, {})
+        fingerprints = dict(last_fingerprints)
+        results = await asyncio.gather(
+            *[self._load_user(user, gsuite_users, fingerprints) for user in users]
+        )
+        if self._avatar_cache is not None:
+            await self._avatar_cache.save_index()
+        # Forget about anyone we didn't look up this time
+        fingerprints = {
+            user.username: fingerprints[user.username]
+            for user in users
+            if user.username in fingerprints
+        }
+        if fingerprints != last_fingerprints:
+            self.save_checkpoint(UserInfo.USER_FINGERPRINTS_CHECKPOINT, fingerprints)
+
+        new, changed, unchanged = [
+            results.count(result) for result in ("new", "changed", "unchanged")
+        ]
+        self.record_tells(created=new, changed=changed, unchanged=unchanged)
+
         self._user_manager.refresh()
-        self._user_manager.persist()
+        self.persist()
+
+        return f"Success! {len(users)} users:  {new} new / {changed} changed / {unchanged} unchanged."
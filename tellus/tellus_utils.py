@@ -1,5 +1,8 @@
+import asyncio
 import datetime as dt
 import logging
+import math
+import time
 
 import aiohttp
 from dateutil.parser import parse, ParserError
@@ -7,10 +10,56 @@ from tellus.creds import get_credentials_from_vault
 
 DATETIME_DEFAULT_FORMAT = "%Y-%m-%d %H:%M %Z"
 
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+_ONE_MICROSECOND = dt.timedelta(microseconds=1)
+
+HTTP_CONNECTIONS_PER_HOST = 10
+HTTP_DNS_CACHE_SECONDS = 300
+AVAILABILITY_CHECK_BYTES = (
+    1024  # how much of a page to fetch if we can't just check its headers
+)
+
+_http_session = None
+_http_session_loop = None
+
+
+def http_session():
+    """
+    :return: the HTTP client session shared across Tellus (created if necessary).  It keeps connections alive
+        for reuse (limited per host), caches DNS lookups, and verifies TLS certificates.  It never keeps cookies,
+        so nothing one (authenticated) request was given leaks out with the next.
+    """
+    # pylint: disable=global-statement
+    global _http_session, _http_session_loop
+    loop = asyncio.get_event_loop()
+    if _http_session is None or _http_session.closed or _http_session_loop is not loop:
+        _http_session = aiohttp.ClientSession(
+            cookie_jar=aiohttp.DummyCookieJar(),
+            connector=aiohttp.TCPConnector(
+                limit_per_host=HTTP_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_SECONDS,
+            ),
+        )
+        _http_session_loop = loop
+    return _http_session
+
+
+async def close_http_session(_=None):
+    """
+    Close the shared HTTP client session, if there is one.  Registered to run when the web app is cleaned up.
+    """
+    # pylint: disable=global-statement
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
 
 async def is_url_available(url, timeout_seconds=1):
     """
     Ping a URL and see if it is active.  (Primarily for improved ease of mocking.  You may mock me.)
+    Checks the headers with a HEAD request where the server allows it, otherwise just fetches the start of the page.
+
     :param url: the URL to check
     :param timeout_seconds: has a default, but can be overridden
     :return: true if the URL is "available" (i.e., returns some value)
@@ -19,17 +68,31 @@ async def is_url_available(url, timeout_seconds=1):
     available = False
     logging.debug("Checking if address '%s' is available.", url)
 
+    session = http_session()
     timeout = aiohttp.ClientTimeout(total=timeout_seconds)
-    session = aiohttp.ClientSession(
-        timeout=timeout, connector=aiohttp.TCPConnector(verify_ssl=False)
-    )
 
+    # We only want to know if something is there, so don't care about certificates (and send no credentials)
     # pylint: disable=broad-except
     try:
-        response = await session.get(url)
-        status = response.status
-        text = await response.text()
-        available = status == 200 and len(text) > 0
+        async with session.head(
+            url, timeout=timeout, allow_redirects=True, ssl=False
+        ) as response:
+            status = response.status
+            content_length = response.content_length
+            available = status == 200 and bool(content_length)
+
+        # Fall back to fetching the page itself if the server doesn't do HEAD requests, or won't say how long it
+        # is - plenty of dynamic pages answer a HEAD with an empty 200
+        if status in (405, 501) or (status == 200 and not content_length):
+            async with session.get(
+                url,
+                timeout=timeout,
+                headers={"Range": f"bytes=0-{AVAILABILITY_CHECK_BYTES - 1}"},
+                ssl=False,
+            ) as response:
+                status = response.status
+                content = await response.content.read(AVAILABILITY_CHECK_BYTES)
+                available = status in (200, 206) and len(content) > 0
 
         if not available:
             logging.debug("'%s' is not available - status was %s", url, status)
@@ -37,8 +100,6 @@ async def is_url_available(url, timeout_seconds=1):
         # Intentionally ignoring exceptions here...
         logging.debug("'%s' is not available: %s", url, repr(exception))
 
-    await session.close()
-
     return available
 
 
@@ -63,6 +124,95 @@ def now_string():
     return datetime_string(now())
 
 
+def now_epoch_micros():
+    """
+    :return: the current time as integer microseconds since the epoch.  Much cheaper than now() or now_string()
+        when all that is needed is a timestamp.
+    """
+    return time.time_ns() // 1000
+
+
+def datetime_from_epoch_micros(epoch_micros):
+    """
+    :return: a UTC datetime for a timestamp in microseconds since the epoch
+    """
+    return _EPOCH + dt.timedelta(microseconds=epoch_micros)
+
+
+def epoch_micros_from_datetime(datetime):
+    """
+    :return: the datetime as integer microseconds since the epoch.  Naive datetimes are assumed to be UTC.
+    """
+    if datetime.tzinfo is None:
+        datetime = datetime.replace(tzinfo=dt.timezone.utc)
+    return (datetime - _EPOCH) // _ONE_MICROSECOND
+
+
+def percentile(values, percent):
+    """
+    :param values: the values to find the percentile of
+    :param percent: the percentile to find, from 0 to 100
+    :return: the nearest-rank percentile of the values, or None if there are no values
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class TTLCache:
+    """
+    A simple in-memory cache whose entries expire a fixed number of seconds after they were put.  Expired entries
+    are dropped as new ones are put, so it only ever holds (roughly) what was put in the last ttl_seconds.
+    """
+
+    def __init__(self, ttl_seconds, clock=time.monotonic):
+        """
+        :param ttl_seconds: how long an entry is good for
+        :param clock: returns the current time in seconds - mostly to allow for easy testing
+        """
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = (
+            {}
+        )  # In the order they expire, as every entry lives for the same time
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        :return: the cached value for the key, or the default if there is none or it has expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if self._clock() >= expires:
+            del self._entries[key]
+            return default
+        return value
+
+    def put(self, key, value):
+        now = self._clock()
+        self._entries.pop(key, None)  # So it moves to the end
+        self._entries[key] = (now + self._ttl_seconds, value)
+
+        while True:
+            oldest_key = next(iter(self._entries))
+            expires, _ = self._entries[oldest_key]
+            if now < expires:
+                break
+            del self._entries[oldest_key]
+
+    def clear(self):
+        self._entries.clear()
+
+
 def datetime_string(datetime):
     return datetime.isoformat()
 
@@ -19,6 +19,7 @@ from tellus.wiring import (
     R_MGMT,
     R_USER,
     SESSION_TELLUS_USER,
+    DATA_USER_INFO,
 )
 
 SESSION_AUTH_USER_EMAIL = "OIDC_CLAIM_email"
@@ -154,7 +155,7 @@ class User:
 
     LAST_LOGIN = "last_login"
 
-    USER_INFO_DATA = "user-info"
+    USER_INFO_DATA = DATA_USER_INFO
     FULL_NAME = "Full Name"
     EMAIL = "Email"
     PHONE = "Phone"
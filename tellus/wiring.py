@@ -18,6 +18,7 @@ R_SEARCH = "e"  # basic json of a group of Tells, based on a search string
 # R_TELLS_VERBOSE = "v"  # full json for a queried group of Tells, based on a query string
 R_SOURCES = "o"  # routes for controlling sources
 R_USER = "u"  # routes for information pertaining to a specific tellus user
+R_AVATARS = "a"  # user avatar images, cached by Tellus
 R_MGMT = "m"  # routes for management functions and controls for Tellus
 R_TESTING = "x"  # routes for testing and monitoring endpoints (e.g., Tellus status)
 R_UNSECURE = "y"  # routes for testing and monitoring endpoints that are expected to bypass the proxy
@@ -64,6 +65,9 @@ UI_SUPPRESSED_CATEGORIES = [
 
 TELLUS_UI_INFO = "tellus-info"
 
+# Data block names
+DATA_USER_INFO = "user-info"
+
 
 def ui_route_to_tell(alias):
     return f"{UI_ROUTE_TELL}{alias}"
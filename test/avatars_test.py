@@ -0,0 +1,158 @@
+import ssl
+
+from aiohttp import BasicAuth, web
+
+from tellus.avatars import AvatarCache, AVATAR_MAX_AGE_SECONDS
+from tellus.tellus_utils import close_http_session, http_session, is_url_available
+
+SATURN_GIRL = b"\x89PNG saturn girl" * 10
+COSMIC_BOY = b"\x89PNG cosmic boy" * 10
+
+
+def cached_file(cache, username):
+    return cache._avatar_file(username)
+
+
+async def fake_confluence(aiohttp_server, images):
+    """
+    A stand-in for Confluence that serves avatar images with ETags, and keeps track of what was asked of it.
+    """
+    requests = []
+
+    async def avatar(request):
+        name = request.match_info["name"]
+        etag = f'"{name}-{len(images[name])}"'
+        requests.append((name, request.headers.get("If-None-Match")))
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(
+            body=images[name], content_type="image/png", headers={"ETag": etag}
+        )
+
+    app = web.Application()
+    app.router.add_get("/avatars/{name}", avatar)
+    server = await aiohttp_server(app)
+    return server, requests
+
+
+async def test_avatar_cache(aiohttp_server, tmp_path):
+    images = {"saturngirl": SATURN_GIRL, "cosmicboy": COSMIC_BOY}
+    server, requests = await fake_confluence(aiohttp_server, images)
+    saturn_girl_url = str(server.make_url("/avatars/saturngirl"))
+
+    cache = AvatarCache(tmp_path)
+    url = await cache.refresh("saturngirl", saturn_girl_url)
+    assert url.startswith("/a/saturngirl?v=")
+    assert cached_file(cache, "saturngirl").read_bytes() == SATURN_GIRL
+
+    assert await cache.refresh("saturngirl", saturn_girl_url) == url
+    assert requests[-1] == (
+        "saturngirl",
+        f'"saturngirl-{len(SATURN_GIRL)}"',
+    ), "Should revalidate what we already have"
+
+    images["saturngirl"] = SATURN_GIRL * 2
+    new_url = await cache.refresh("saturngirl", saturn_girl_url)
+    assert new_url != url, "A new image gets a new URL, so browsers pick it up"
+    assert cached_file(cache, "saturngirl").read_bytes() == SATURN_GIRL * 2
+
+    assert (
+        await cache.refresh("lightninglad", str(server.make_url("/nope"))) is None
+    ), "Nothing to cache"
+
+    assert "saturngirl" not in AvatarCache(tmp_path), "Not until the index is saved"
+    await cache.save_index()
+    assert "saturngirl" in AvatarCache(tmp_path), "The cache survives restarts"
+    assert AvatarCache(tmp_path).total_bytes == cache.total_bytes
+
+    await close_http_session()
+
+
+async def test_avatars_are_fetched_over_verified_tls(aiohttp_server, tmp_path, mocker):
+    server, _ = await fake_confluence(aiohttp_server, {"saturngirl": SATURN_GIRL})
+    get = mocker.spy(http_session(), "get")
+
+    cache = AvatarCache(tmp_path)
+    await cache.refresh("saturngirl", str(server.make_url("/avatars/saturngirl")))
+
+    tls = get.call_args.kwargs["ssl"]
+    assert tls.verify_mode == ssl.CERT_REQUIRED and tls.check_hostname
+
+    await close_http_session()
+
+
+async def test_avatar_fetches_leave_no_cookies_behind(aiohttp_server, tmp_path):
+    cookies_sent = []
+
+    async def avatar(request):
+        cookies_sent.append(request.headers.get("Cookie"))
+        response = web.Response(body=SATURN_GIRL, content_type="image/png")
+        response.set_cookie("JSESSIONID", "secret-session")
+        return response
+
+    app = web.Application()
+    app.router.add_route("*", "/{page}", avatar)
+    server = await aiohttp_server(app)
+    # Cookies are never kept for IP addresses anyway, so go by name
+    url = f"http://localhost:{server.port}"
+
+    cache = AvatarCache(tmp_path, auth=BasicAuth("tellus", "secret"))
+    await cache.refresh("saturngirl", f"{url}/saturngirl")
+    assert await is_url_available(f"{url}/saturngirl-homepage")
+    assert cookies_sent == [None, None], "Nothing we were given goes out again"
+
+    await close_http_session()
+
+
+async def test_avatar_cache_drops_least_recently_used(aiohttp_server, tmp_path):
+    images = {"saturngirl": SATURN_GIRL, "cosmicboy": COSMIC_BOY}
+    server, _ = await fake_confluence(aiohttp_server, images)
+
+    cache = AvatarCache(tmp_path, max_bytes=len(SATURN_GIRL) + len(COSMIC_BOY))
+    await cache.refresh("saturngirl", str(server.make_url("/avatars/saturngirl")))
+    await cache.refresh("cosmicboy", str(server.make_url("/avatars/cosmicboy")))
+    await cache.refresh("saturngirl", str(server.make_url("/avatars/saturngirl")))
+    assert cache.total_bytes == len(SATURN_GIRL) + len(COSMIC_BOY)
+
+    cosmic_boy_file = cached_file(cache, "cosmicboy")
+    images["quislet"] = b"quislet"
+    await cache.refresh("quislet", str(server.make_url("/avatars/quislet")))
+    assert "quislet" in cache
+    assert "saturngirl" in cache
+    assert "cosmicboy" not in cache, "Cosmic Boy was the least recently used"
+    assert not cosmic_boy_file.exists()
+    assert cache.total_bytes == len(SATURN_GIRL) + len(b"quislet")
+
+    await close_http_session()
+
+
+async def test_avatar_files_are_not_named_by_username(aiohttp_server, tmp_path):
+    server, _ = await fake_confluence(aiohttp_server, {"saturngirl": SATURN_GIRL})
+    cache = AvatarCache(tmp_path / "avatars")
+    await cache.refresh("../saturngirl", str(server.make_url("/avatars/saturngirl")))
+
+    assert cached_file(cache, "../saturngirl").parent == tmp_path / "avatars"
+    assert not (tmp_path / "saturngirl.png").exists()
+
+    await close_http_session()
+
+
+async def test_serve_avatar(aiohttp_server, aiohttp_client, tmp_path):
+    server, _ = await fake_confluence(aiohttp_server, {"saturngirl": SATURN_GIRL})
+    cache = AvatarCache(tmp_path)
+    url = await cache.refresh("saturngirl", str(server.make_url("/avatars/saturngirl")))
+
+    app = web.Application()
+    cache.setup_routes(app.router)
+    client = await aiohttp_client(app)
+
+    response = await client.get(url)
+    assert response.status == 200
+    assert await response.read() == SATURN_GIRL
+    assert response.headers["content-type"] == "image/png"
+    assert str(AVATAR_MAX_AGE_SECONDS) in response.headers["cache-control"]
+
+    response = await client.get("/a/cosmicboy")
+    assert response.status == 404
+
+    await close_http_session()
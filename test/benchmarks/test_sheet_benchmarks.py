@@ -0,0 +1,93 @@
+# pylint: skip-file
+"""
+Benchmarks for parsing Google Sheet tabs into Tells.  Like the other benchmarks, these are not run as part of the
+normal tests (see `make benchmark`), and report their results to stdout, so run with `-s` to see them.
+"""
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from tellus.tellus_sources.google_sheets_source import Sheet, SheetParser
+from test.tells_test import create_test_teller
+
+ROW_COUNT = 50000
+TAB_NAME = "Tools"
+
+SHEET_CONFIG = """
+Sheet,Column,TellusProperty,TellusType
+Tools,Name,alias,
+Tools,Name,go-url,linked-text
+Tools,Summary,description,
+Tools,Owner,data,user
+Tools,Website,go-url,
+Tools,Started,data,date
+"""
+
+
+def synthetic_tab(row_count=ROW_COUNT):
+    """
+    A tab shaped like the ones people actually give us: mostly strings, some blanks, a few numbers.
+    """
+    rows = np.arange(row_count)
+    return pd.DataFrame(
+        {
+            "Name": [f"Tool Number {row}" for row in rows],
+            "Summary": [f"Tool {row} does a great many things" for row in rows],
+            "Owner": [f"owner{row % 97}" if row % 3 else "" for row in rows],
+            "Website": [
+                f"https://tools.example.com/{row}" if row % 2 else "" for row in rows
+            ],
+            "Tags": ["benchmark, tools, synthetic"] * row_count,
+            "Started": [2000 + row % 20 for row in rows],
+            "Notes": [f"Note {row}" if row % 5 == 0 else "" for row in rows],
+        }
+    )
+
+
+def tab_config():
+    return Sheet.tab_config(TAB_NAME, pd.read_csv(io.StringIO(SHEET_CONFIG)))
+
+
+def _report(name, seconds):
+    print(f"\n{name}: {ROW_COUNT / seconds:,.0f} rows/second ({seconds:.3f}s)")
+    return seconds
+
+
+def _time(timed):
+    start = time.perf_counter()
+    result = timed()
+    return time.perf_counter() - start, result
+
+
+def test_sheet_parsing_throughput():
+    tab_df = synthetic_tab()
+    parser = SheetParser(tab_config())
+
+    row_seconds, by_row = _time(
+        lambda: [parser.parse(row, TAB_NAME) for _, row in tab_df.iterrows()]
+    )
+    _report("SheetParser.parse, row by row", row_seconds)
+    tab_seconds, (by_tab, parse_errors) = _time(
+        lambda: parser.parse_tab(tab_df, TAB_NAME)
+    )
+    _report("SheetParser.parse_tab, column by column", tab_seconds)
+    print(f"Speedup: {row_seconds / tab_seconds:.2f}x")
+
+    assert by_tab == by_row
+    assert parse_errors == [None] * ROW_COUNT
+    assert tab_seconds < row_seconds
+
+
+def test_load_tab_throughput():
+    tab_df = synthetic_tab()
+    teller = create_test_teller()
+
+    seconds, invalid_records = _time(
+        lambda: Sheet.load_tab(teller, TAB_NAME, tab_df, tab_config(), "benchmark")
+    )
+    _report("Sheet.load_tab", seconds)
+
+    assert invalid_records == []
+    assert teller.tells_count() >= ROW_COUNT
@@ -0,0 +1,48 @@
+# pylint: skip-file
+"""
+Microbenchmarks for Tellus' hot paths.  These are not run as part of the normal tests (see `make benchmark`),
+and report their results to stdout, so run with `-s` to see them.
+"""
+import timeit
+
+from tellus.configuration import TELLUS_INTERNAL
+from tellus.tell import Tell
+from test.tells_test import create_test_teller, create_tells_for_aliases
+
+ALIAS_COUNT = 2000
+LOOKUPS = 50000
+
+
+def _report(name, lookups, seconds):
+    print(f"\n{name}: {lookups / seconds:,.0f} lookups/second ({seconds:.3f}s)")
+    return lookups / seconds
+
+
+def _time_teller_gets(teller, raw_aliases):
+    def lookups():
+        for index in range(LOOKUPS):
+            teller.get(raw_aliases[index % len(raw_aliases)])
+
+    return min(timeit.repeat(lookups, number=1, repeat=3))
+
+
+def test_teller_get_throughput(mocker):
+    teller = create_test_teller()
+    aliases = [f"benchmark-tell-{index}" for index in range(ALIAS_COUNT)]
+    create_tells_for_aliases(teller, aliases, TELLUS_INTERNAL, "benchmark")
+    # Request traffic rarely arrives in canonical form
+    raw_aliases = [alias.replace("-", " ").title() for alias in aliases]
+
+    cached = _report(
+        "Teller.get (cached slugify)", LOOKUPS, _time_teller_gets(teller, raw_aliases)
+    )
+
+    mocker.patch.object(Tell, "slugify", staticmethod(Tell.slugify.__wrapped__))
+    uncached = _report(
+        "Teller.get (uncached slugify)",
+        LOOKUPS,
+        _time_teller_gets(teller, raw_aliases),
+    )
+
+    print(f"Speedup: {cached / uncached:.2f}x")
+    assert cached > uncached
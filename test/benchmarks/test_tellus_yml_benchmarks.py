@@ -0,0 +1,99 @@
+# pylint: skip-file
+"""
+Benchmarks for parsing tellus.yml files.  Like the other benchmarks, these are not run as part of the normal tests
+(see `make benchmark`), and report their results to stdout, so run with `-s` to see them.
+"""
+import asyncio
+import time
+
+import yaml
+
+from tellus.tellus_sources.tellus_yaml_source import (
+    TellusYMLSource,
+    TellusYAMLLoader,
+    parse_tellus_ymls,
+)
+from test.tells_test import create_test_teller
+
+FILE_COUNT = 300
+DOCUMENTS_PER_FILE = 20
+
+
+def synthetic_tellus_yml(file_number):
+    documents = [
+        f"""alias: tool-{file_number}
+description: 'Tool number {file_number}, which does a great many things'
+go_url: 'https://tools.example.com/{file_number}'
+tags: 'benchmark, tools, synthetic'
+docs: 'https://docs.example.com/tool-{file_number}'
+builds: 'https://builds.example.com/tool-{file_number}'
+"""
+    ]
+    for related in range(DOCUMENTS_PER_FILE - 1):
+        documents.append(
+            f"""alias: -related-{related}
+description: 'Something related to tool {file_number}: part {related}'
+go_url: 'https://tools.example.com/{file_number}/{related}'
+tags: 'benchmark, related *'
+colors: [red, white, blue]
+owners:
+  - name: Owner {related}
+    email: owner{related}@example.com
+"""
+        )
+    return "---\n".join(documents)
+
+
+def _report(name, seconds):
+    print(f"\n{name}: {FILE_COUNT / seconds:,.0f} files/second ({seconds:.3f}s)")
+    return seconds
+
+
+def _best_of(timed, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        timed()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_tellus_yml_parsing_throughput():
+    corpus = [synthetic_tellus_yml(number) for number in range(FILE_COUNT)]
+
+    pure_python = _report(
+        "yaml.FullLoader (pure Python)",
+        _best_of(
+            lambda: [list(yaml.load_all(yml, Loader=yaml.FullLoader)) for yml in corpus]
+        ),
+    )
+    tellus_loader = _report(
+        f"{TellusYAMLLoader.__name__}", _best_of(lambda: parse_tellus_ymls(corpus))
+    )
+    print(f"Loader speedup: {pure_python / tellus_loader:.2f}x")
+
+    source = TellusYMLSource(create_test_teller())
+    batches = [
+        corpus[start : start + TellusYMLSource.PARSE_BATCH_SIZE]
+        for start in range(0, FILE_COUNT, TellusYMLSource.PARSE_BATCH_SIZE)
+    ]
+
+    async def parse_in_pool():
+        await asyncio.gather(
+            *[source.run_cpu_bound(parse_tellus_ymls, batch) for batch in batches]
+        )
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(parse_in_pool())  # Warm up the process pool
+        pooled = _report(
+            f"{TellusYAMLLoader.__name__} in the process pool",
+            _best_of(lambda: loop.run_until_complete(parse_in_pool())),
+        )
+    finally:
+        loop.close()
+    print(f"Process pool speedup over pure Python: {pure_python / pooled:.2f}x")
+
+    if yaml.__with_libyaml__:
+        assert tellus_loader < pure_python
@@ -0,0 +1,86 @@
+from tellus import google_api_utils
+from tellus.google_api_utils import retrieve_gsuite_user_directory
+
+LEGIONNAIRES = [
+    {
+        "primaryEmail": f"legionnaire{number}@thelegion.org",
+        "name": {"fullName": f"Legionnaire {number}"},
+        "phones": [{"type": "mobile", "value": f"555 {number:04}"}],
+        "addresses": [{"type": "home"}],
+    }
+    for number in range(7)
+]
+
+
+class FakeDirectoryRequest:
+    def __init__(self, directory, parameters):
+        self.directory = directory
+        self.parameters = parameters
+
+    def execute(self):
+        self.directory.requests.append(self.parameters)
+        start = int(self.parameters.get("pageToken", 0))
+        end = start + self.parameters["maxResults"]
+
+        requested = self.parameters["fields"][len("nextPageToken,users(") : -1]
+        response = {
+            "users": [
+                {field: user[field] for field in requested.split(",") if field in user}
+                for user in self.directory.users_data[start:end]
+            ]
+        }
+        if end < len(self.directory.users_data):
+            response["nextPageToken"] = str(end)
+        return response
+
+
+class FakeDirectory:
+    """
+    Just enough of the Directory API's users() resource to page through some users.
+    """
+
+    def __init__(self, users_data):
+        self.users_data = users_data
+        self.requests = []
+
+    def users(self):
+        return self
+
+    def list(self, **parameters):
+        return FakeDirectoryRequest(self, parameters)
+
+    def list_next(self, previous_request, previous_response):
+        if "nextPageToken" not in previous_response:
+            return None
+        return FakeDirectoryRequest(
+            self,
+            {
+                **previous_request.parameters,
+                "pageToken": previous_response["nextPageToken"],
+            },
+        )
+
+
+def test_retrieve_gsuite_user_directory(monkeypatch):
+    monkeypatch.setattr(google_api_utils, "DIRECTORY_PAGE_SIZE", 3)
+    directory = FakeDirectory(LEGIONNAIRES)
+
+    users = retrieve_gsuite_user_directory(service=directory)
+    assert len(directory.requests) == 3, "Should have followed the page tokens"
+    assert len(users) == 7
+    assert users["legionnaire6@thelegion.org"] == {
+        "primaryEmail": "legionnaire6@thelegion.org",
+        "name": {"fullName": "Legionnaire 6"},
+        "phones": [{"type": "mobile", "value": "555 0006"}],
+    }, "Only the fields we need are requested"
+    assert (
+        directory.requests[0]["fields"]
+        == "nextPageToken,users(name,primaryEmail,phones)"
+    )
+
+    names = retrieve_gsuite_user_directory(["name"], service=directory)
+    assert len(directory.requests) == 6
+    assert names["legionnaire0@thelegion.org"] == {
+        "primaryEmail": "legionnaire0@thelegion.org",
+        "name": {"fullName": "Legionnaire 0"},
+    }, "Always need the email"
@@ -1,5 +1,6 @@
 import json
 import pathlib
+import re
 import datetime as dt
 from io import StringIO
 
@@ -187,6 +188,30 @@ def test_audit_info():
     ).seconds < 1, "created_datetime should roughly be 'now'"
 
 
+def test_audit_info_legacy_timestamps():
+    legacy_tell = Tell("tellus", TELLUS_GO).to_json_pickle()
+    audit_info = Tell.from_json_pickle(legacy_tell).audit_info
+    assert isinstance(audit_info._created, int)
+
+    # Save files from before epoch timestamps have ISO strings instead
+    legacy_tell = re.sub(
+        r'"_created": \d+', '"_created": "2021-02-01T17:49:54.922667+00:00"', legacy_tell
+    )
+    legacy_tell = re.sub(
+        r'"_last_modified": \d+',
+        '"_last_modified": "2021-02-02T17:49:54.922667+00:00"',
+        legacy_tell,
+    )
+    audit_info = Tell.from_json_pickle(legacy_tell).audit_info
+    assert audit_info._created == 1612201794922667
+    assert audit_info._last_modified == 1612288194922667
+    assert audit_info.created == "2021-02-01T17:49:54.922667+00:00"
+    assert audit_info.last_modified == "2021-02-02T17:49:54.922667+00:00"
+    assert audit_info.seconds_since_last_modified(
+        dt.datetime.fromisoformat("2021-02-02T17:50:04.922667+00:00")
+    ) == 10
+
+
 def test_audit_to_simple_dict_and_json():
     audit_info = ZAuditInfo("saturngirl")
     audit_info.modified("cosmicboy")
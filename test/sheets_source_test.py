@@ -1,9 +1,14 @@
 # pylint: skip-file
 #   lots of stuff pylint doesn't like in here that is particular to these tests
+import csv
 import io
 import pytest
 from unittest import mock
 
+import gspread
+import requests
+from aiohttp import web
+
 from sortedcontainers import SortedSet
 
 from tellus.tell import InvalidAliasException, Tell
@@ -273,3 +278,229 @@ def test_load_tab_basics():
 #         fatal_five.get_data(GoogleSheetsSource.SOURCE_ID)
 #         == TELLUS_TEST_TAB_2_DATA[FATAL_FIVE]
 #     )
+
+
+def test_parse_tab():
+    tab_df = pd.read_csv(io.StringIO(TELLUS_TEST_TAB_2_DATA))
+    parser = SheetParser(configify(TELLUS_TEST_TAB_2, TELLUS_TEST_SHEET_CONFIG_NORMAL))
+
+    tell_dicts, parse_errors = parser.parse_tab(tab_df, TELLUS_TEST_TAB_2)
+    assert parse_errors == [None] * len(tab_df)
+    assert tell_dicts == [
+        parser.parse(row, TELLUS_TEST_TAB_2) for _, row in tab_df.iterrows()
+    ], "Parsing the whole tab at once should give just the same results as parsing it a row at a time"
+
+    mordru = tell_dicts[0]
+    assert mordru[Tell.ALIAS] == MORDRU
+    assert mordru[SheetParser.duplicate_key(Tell.ALIAS, "Tellus Alias")] == MORDRU
+    assert mordru["go-url"] == "http://www.badsorcerer.com"
+    assert mordru["TTest2 | Villain Powers"] == "Magic"
+    assert Tell.ALIAS not in tell_dicts[2], "Bad Horse has no mapped Tellus Alias"
+    assert tell_dicts[4] == {
+        "TTest2 | Record Name": "Invalid Empty",
+        "TTest2 | Comments/Invalidity": "A mostly empty row",
+    }
+
+
+def test_parse_tab_invalid_aliases():
+    tab_df = pd.DataFrame(
+        {"Name": ["saturn girl", "x", 12, "cosmic boy"], "Summary": ["A founder"] * 4}
+    )
+    parser = SheetParser(configify(TELLUS_TEST_TAB_1, TELLUS_TEST_SHEET_CONFIG_NORMAL))
+
+    tell_dicts, parse_errors = parser.parse_tab(tab_df, TELLUS_TEST_TAB_1)
+    assert parse_errors[0] is None
+    assert isinstance(parse_errors[1], InvalidAliasException)
+    assert parse_errors[2] is not None
+    assert parse_errors[3] is None
+    assert tell_dicts[3][Tell.ALIAS] == "cosmic-boy"
+
+    teller = create_test_teller()
+    invalid_records = Sheet.load_tab(
+        teller,
+        TELLUS_TEST_TAB_1,
+        tab_df,
+        configify(TELLUS_TEST_TAB_1, TELLUS_TEST_SHEET_CONFIG_NORMAL),
+        "test_parse_tab_invalid_aliases",
+    )
+    assert [record[Sheet.INVALID_RECORD]["Name"] for record in invalid_records] == [
+        "x",
+        12,
+    ]
+    assert teller.get("saturn-girl").description == "A founder"
+    assert teller.get("cosmic-boy").description == "A founder"
+
+
+class FakeSheetsSession(requests.Session):
+    """
+    Sends gspread's requests to our fake Sheets API, rather than the real one.
+    """
+
+    def __init__(self, api_url):
+        super().__init__()
+        self.api_url = api_url
+
+    def request(self, method, url, *args, **kwargs):
+        url = url.replace("https://sheets.googleapis.com", self.api_url)
+        return super().request(method, url, *args, **kwargs)
+
+
+def csv_values(csv_data):
+    """
+    :return: the values of a tab as the Sheets API would give them back, with trailing blanks left off
+    """
+    values = []
+    for row in csv.reader(io.StringIO(csv_data.strip())):
+        while row and row[-1] == "":
+            row.pop()
+        values.append(row)
+    return values
+
+
+async def fake_sheets_api(aiohttp_server, tabs):
+    """
+    Just enough of the Sheets API to open a spreadsheet and batchGet its values.  Keeps track of the requests.
+    """
+    requests_made = []
+
+    async def spreadsheet(request):
+        requests_made.append("metadata")
+        return web.json_response(
+            {
+                "spreadsheetId": request.match_info["key"],
+                "properties": {"title": "The Legion"},
+                "sheets": [
+                    {
+                        "properties": {
+                            "title": tab_name,
+                            "sheetId": index,
+                            "index": index,
+                        }
+                    }
+                    for index, tab_name in enumerate(tabs)
+                ],
+            }
+        )
+
+    async def batch_get(request):
+        ranges = request.query.getall("ranges")
+        requests_made.append(ranges)
+        value_ranges = []
+        for tab_range in ranges:
+            tab_name = tab_range[1:-1].replace("''", "'")
+            if tab_name not in tabs:
+                return web.json_response(
+                    {
+                        "error": {
+                            "code": 400,
+                            "message": f"Unable to parse range: {tab_range}",
+                            "status": "INVALID_ARGUMENT",
+                        }
+                    },
+                    status=400,
+                )
+            value_ranges.append(
+                {
+                    "range": f"{tab_range}!A1:Z1000",
+                    "majorDimension": "ROWS",
+                    "values": csv_values(tabs[tab_name]),
+                }
+            )
+        return web.json_response(
+            {"spreadsheetId": request.match_info["key"], "valueRanges": value_ranges}
+        )
+
+    app = web.Application()
+    app.router.add_get("/v4/spreadsheets/{key}", spreadsheet)
+    app.router.add_get("/v4/spreadsheets/{key}/values:batchGet", batch_get)
+    server = await aiohttp_server(app)
+    client = gspread.Client(None, session=FakeSheetsSession(str(server.make_url(""))))
+    return client, requests_made
+
+
+async def test_retrieve_tabs_in_a_single_request(aiohttp_server):
+    tabs = {
+        Sheet._CONFIG_SHEET: TELLUS_TEST_SHEET_CONFIG_NORMAL,
+        TELLUS_TEST_TAB_1: TELLUS_TEST_TAB_1_DATA,
+        TELLUS_TEST_TAB_2: TELLUS_TEST_TAB_2_DATA,
+        "Unconfigured": "Name\nnobody",
+    }
+    gspread_client, requests_made = await fake_sheets_api(aiohttp_server, tabs)
+    teller = create_test_teller()
+    source = GoogleSheetsSource(teller)
+    sheet_tell = Sheet.create(
+        teller,
+        "legion-sheet",
+        sheet_url="https://docs.google.com/spreadsheets/d/legion-sheet-key/edit",
+    ).tell
+
+    sheet = Sheet(sheet_tell, gspread_client)
+    config_df, tab_dfs = await source.run_blocking(sheet.retrieve_tabs)
+    assert (
+        sheet.datum(Sheet._RETRIEVED_TABS) is None
+    ), "The Tell is only updated back on the event loop"
+    sheet.remember_retrieved_tabs(tab_dfs)
+    assert requests_made == [
+        "metadata",
+        ["'tellus-sheet-config'"],
+        ["'TTest1'", "'TTest2'"],
+    ], "The first time through, we don't know which tabs to ask for along with the config"
+    assert list(tab_dfs.keys()) == [TELLUS_TEST_TAB_1, TELLUS_TEST_TAB_2]
+    assert tab_dfs[TELLUS_TEST_TAB_1].equals(
+        pd.read_csv(
+            io.StringIO(TELLUS_TEST_TAB_1_DATA), dtype=str, keep_default_na=False
+        )
+    ), "Should be just what get_all_records would have given us"
+    assert config_df.loc[0, "TellusProperty"] == Tell.ALIAS
+
+    requests_made.clear()
+    sheet = Sheet(sheet_tell, gspread_client)
+    config_df, tab_dfs = await source.run_blocking(sheet.retrieve_tabs)
+    assert requests_made == [
+        "metadata",
+        ["'tellus-sheet-config'", "'TTest1'", "'TTest2'"],
+    ], "After that, a single request gets everything"
+    assert list(tab_dfs.keys()) == [TELLUS_TEST_TAB_1, TELLUS_TEST_TAB_2]
+
+    invalid_records = sheet.load_all_tabs(teller, tab_dfs, config_df, sheet.alias)
+    assert len(invalid_records[TELLUS_TEST_TAB_1]) == 1
+    assert len(invalid_records[TELLUS_TEST_TAB_2]) == INVALID_RECORDS
+    assert teller.get("saturn-girl").description == "A founder"
+    assert teller.get(MORDRU).description == "Bad Sorcerer"
+
+    del tabs[TELLUS_TEST_TAB_2]
+    tabs[Sheet._CONFIG_SHEET] = "\n".join(
+        line
+        for line in TELLUS_TEST_SHEET_CONFIG_NORMAL.splitlines()
+        if not line.startswith(TELLUS_TEST_TAB_2)
+    )
+    requests_made.clear()
+    config_df, tab_dfs = await source.run_blocking(sheet.retrieve_tabs)
+    sheet.remember_retrieved_tabs(tab_dfs)
+    assert requests_made == [
+        ["'tellus-sheet-config'", "'TTest1'", "'TTest2'"],
+        ["'tellus-sheet-config'"],
+        ["'TTest1'"],
+    ], "If a tab goes away, fall back to the config"
+    assert list(tab_dfs.keys()) == [TELLUS_TEST_TAB_1]
+
+    requests_made.clear()
+    await source.run_blocking(sheet.retrieve_tabs)
+    assert requests_made == [
+        ["'tellus-sheet-config'", "'TTest1'"]
+    ], "And from then on, just ask for the tabs that are left"
+
+    requests_made.clear()
+    await source.run_blocking(sheet.retrieve_tabs, TELLUS_TEST_TAB_1)
+    assert requests_made == [["'tellus-sheet-config'", "'TTest1'"]]
+
+
+def test_records_df_rejects_duplicate_headers():
+    values = csv_values("Name,Description,Name\nSaturn Girl,A founder,Imra")
+    with pytest.raises(gspread.exceptions.GSpreadException):
+        Sheet.records_df(values)
+
+    values = csv_values("Name,,Description,,Notes\nSaturn Girl,,A founder,,")
+    assert (
+        Sheet.records_df(values).loc[0, "Description"] == "A founder"
+    ), "Blank spacer columns are fine"
@@ -1,4 +1,10 @@
+import asyncio
 import logging
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
 
 import pytest
 
@@ -6,12 +12,16 @@ from tellus.sources import (
     Sourcer,
     Source,
     DuplicateSourceException,
+    SourceDependencyException,
     STATUS_COMPLETED,
     STATUS_NOT_RUN,
     STATUS_FAILED,
+    STATUS_RUNNING,
+    close_cpu_bound_pool,
+    _cpu_bound_pool,
 )
 from tellus.tell import InvalidAliasException
-from tellus.tellus_utils import now_string
+from tellus.tellus_utils import now, now_string
 from test.tells_test import create_test_teller
 
 SRC_TEST = "testing-source"
@@ -25,17 +35,33 @@ class FakeSource(Source):
         boom=False,
         run_restriction=None,
         teller=None,
+        dependencies=None,
+        delay=0,
+        run_log=None,
+        period=Source.DEFAULT_PERIOD,
+        timeout=Source.DEFAULT_TIMEOUT,
     ):
         super().__init__(
             teller,
             source_id=source_id,
             description=description,
             run_restriction=run_restriction,
+            dependencies=dependencies,
+            period=period,
+            timeout=timeout,
         )
         self._run_result = None
         self._boom = boom
+        self._delay = delay
+        self._run_log = run_log
 
     async def load_source(self):
+        if self._run_log is not None:
+            self._run_log.append(f"{self.source_id} started")
+        await asyncio.sleep(self._delay)
+        if self._run_log is not None:
+            self._run_log.append(f"{self.source_id} finished")
+
         if self._boom:
             raise Exception("Boom.")
 
@@ -171,5 +197,569 @@ async def test_source_should_run():
     assert once_again.last_run == again_last
 
 
+async def test_load_sources_respects_dependencies():
+    teller = create_test_teller()
+    run_log = []
+    sourcer = Sourcer(
+        teller,
+        [
+            FakeSource("dependent", dependencies=["first"], run_log=run_log),
+            FakeSource("first", delay=0.05, run_log=run_log),
+            FakeSource("independent", delay=0.05, run_log=run_log),
+            FakeSource(
+                "not-blocked-by-missing", dependencies=["not-enabled"], run_log=run_log,
+            ),
+        ],
+    )
+
+    assert [source.source_id for source in sourcer._load_order] == [
+        "first",
+        "independent",
+        "not-blocked-by-missing",
+        "dependent",
+    ]
+
+    start = time.monotonic()
+    await sourcer.load_sources()
+    elapsed = time.monotonic() - start
+
+    assert run_log.index("dependent started") > run_log.index(
+        "first finished"
+    ), "A source should not start loading until the sources it depends on have finished"
+    assert run_log.index("independent started") < run_log.index(
+        "first finished"
+    ), "Sources without dependencies between them should load concurrently"
+    assert (
+        elapsed < 0.1
+    ), "Independent slow sources should be loaded concurrently, not one after the other"
+
+
+async def test_failed_dependency_still_loads_dependents():
+    teller = create_test_teller()
+    dependent = FakeSource("dependent", dependencies=["boom-source"])
+    sourcer = Sourcer(teller, [FakeSource("boom-source", boom=True), dependent])
+
+    await sourcer.load_sources()
+    assert dependent.load_completed
+
+
+def test_source_dependency_cycles():
+    teller = create_test_teller()
+    with pytest.raises(SourceDependencyException):
+        Sourcer(
+            teller,
+            [
+                FakeSource("chicken", dependencies=["egg"]),
+                FakeSource("egg", dependencies=["chicken"]),
+                FakeSource("rooster"),
+            ],
+        )
+
+
+class FakeClock:
+    """
+    Stands in for the event loop's clock in the periodic load scheduler, so time only passes when it sleeps.
+    """
+
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class GatedSource(FakeSource):
+    """
+    A source whose loads don't finish until its gate is opened.
+    """
+
+    def __init__(self, source_id, **kwargs):
+        super().__init__(source_id, **kwargs)
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def load_source(self):
+        if self._run_log is not None:
+            self._run_log.append(f"{self.source_id} waiting")
+        await self.gate.wait()
+        return await super().load_source()
+
+
+async def periodic_sourcer(teller, sources):
+    """
+    :return: a Sourcer that has done its startup load, with each source's next load scheduled a period after time 0
+    """
+    clock = FakeClock()
+    sourcer = Sourcer(teller, sources, clock=clock.time, sleep=clock.sleep)
+    sourcer.PERIOD_JITTER = 0
+    await sourcer.load_sources(skip_fresh=True)
+    for source in sources:
+        sourcer._schedule_load(source, 0)
+    return sourcer
+
+
+async def test_periodic_loads_use_each_source_period():
+    teller = create_test_teller()
+    run_log = []
+    slow = GatedSource("slow", period=10, run_log=run_log)
+    sourcer = await periodic_sourcer(
+        teller,
+        [
+            FakeSource("frequent", period=10, run_log=run_log),
+            FakeSource("infrequent", period=3600, run_log=run_log),
+            slow,
+        ],
+    )
+
+    slow.gate.clear()
+    await (await sourcer._run_next_scheduled_load())  # frequent, at 10s
+    slow_load = await sourcer._run_next_scheduled_load()  # slow, at 10s
+    assert slow_load is not None
+    for _ in range(2):
+        await (await sourcer._run_next_scheduled_load())  # frequent, at 20s and 30s
+        assert (
+            await sourcer._run_next_scheduled_load() is None
+        ), "A source should not be reloaded by the schedule while its previous load is still running"
+
+    slow.gate.set()
+    await slow_load
+    await (await sourcer._run_next_scheduled_load())  # frequent, at 40s
+    slow_load = await sourcer._run_next_scheduled_load()
+    assert (
+        slow_load is not None
+    ), "...but once that load finishes, it's back on schedule"
+    await slow_load
+
+    assert run_log.count("frequent started") == 5
+    assert run_log.count("slow started") == 3
+    assert (
+        run_log.count("infrequent started") == 1
+    ), "A source with a long period should only have loaded on startup"
+
+
+async def test_periodic_loads_wait_for_dependencies():
+    teller = create_test_teller()
+    run_log = []
+    dependency = GatedSource("dependency", period=10, run_log=run_log)
+    sourcer = await periodic_sourcer(
+        teller,
+        [
+            dependency,
+            FakeSource(
+                "dependent", period=15, dependencies=["dependency"], run_log=run_log
+            ),
+        ],
+    )
+
+    dependency.gate.clear()
+    run_log.clear()
+
+    dependency_load = await sourcer._run_next_scheduled_load()  # dependency, at 10s
+    dependent_load = await sourcer._run_next_scheduled_load()  # dependent, at 15s
+    await asyncio.sleep(0.01)
+    assert run_log == [
+        "dependency waiting"
+    ], "The dependent waits for the dependency's load to finish"
+
+    dependency.gate.set()
+    await asyncio.gather(dependency_load, dependent_load)
+    assert run_log == [
+        "dependency waiting",
+        "dependency started",
+        "dependency finished",
+        "dependent started",
+        "dependent finished",
+    ]
+
+
+class SlowBlockingSource(FakeSource):
+    """
+    A source whose load makes a slow, blocking call - like the client libraries most of the real sources use.
+    """
+
+    def __init__(self, source_id, blocking_seconds, off_loop=True):
+        super().__init__(source_id)
+        self._blocking_seconds = blocking_seconds
+        self._off_loop = off_loop
+
+    async def load_source(self):
+        if self._off_loop:
+            await self.run_blocking(time.sleep, self._blocking_seconds)
+        else:
+            time.sleep(self._blocking_seconds)
+        return await super().load_source()
+
+
+async def measure_event_loop_lag(coroutine, interval=0.01):
+    """
+    :return: the longest the event loop was late waking up a periodic task while the coroutine ran
+    """
+    loop = asyncio.get_event_loop()
+    max_lag = 0
+    running = asyncio.ensure_future(coroutine)
+    while not running.done():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, loop.time() - expected)
+    await running
+    return max_lag
+
+
+async def test_blocking_loads_do_not_block_the_event_loop():
+    teller = create_test_teller()
+    blocking_seconds = 0.3
+
+    blocking_sourcer = Sourcer(
+        teller, [SlowBlockingSource("blocks-loop", blocking_seconds, off_loop=False)]
+    )
+    assert (
+        await measure_event_loop_lag(blocking_sourcer.load_sources())
+        >= blocking_seconds * 0.9
+    ), "Sanity check that the lag measurement actually notices a blocked loop"
+
+    sourcer = Sourcer(
+        teller,
+        [
+            SlowBlockingSource("off-loop", blocking_seconds),
+            SlowBlockingSource("also-off-loop", blocking_seconds),
+        ],
+    )
+    start = time.monotonic()
+    lag = await measure_event_loop_lag(sourcer.load_sources())
+    elapsed = time.monotonic() - start
+
+    assert (
+        lag < 0.1
+    ), "The event loop should keep serving while a source waits on a blocking call"
+    assert (
+        elapsed < blocking_seconds * 2
+    ), "Blocking calls from different sources should run in parallel on the I/O pool"
+
+
+async def test_concurrent_loads_join_the_running_load():
+    teller = create_test_teller()
+    run_log = []
+    source = FakeSource("single-flight", delay=0.05, run_log=run_log)
+    sourcer = Sourcer(teller, [source])
+
+    await asyncio.gather(
+        sourcer.load_source_for_id("single-flight"),
+        sourcer.load_source_for_id("single-flight"),
+        sourcer.load_sources(),
+    )
+    assert run_log.count("single-flight started") == 1
+
+    await sourcer.load_source_for_id("single-flight")
+    assert (
+        run_log.count("single-flight started") == 2
+    ), "Once a load has finished, a new request should start a new load"
+
+
+async def test_load_jobs():
+    teller = create_test_teller()
+    run_log = []
+    sourcer = Sourcer(
+        teller,
+        [
+            FakeSource("slow-job", delay=0.05, run_log=run_log),
+            FakeSource("boom-job", boom=True),
+        ],
+    )
+
+    job = sourcer.start_load_job("slow-job")
+    assert job.status == STATUS_RUNNING
+    assert (
+        sourcer.start_load_job("slow-job") is job
+    ), "Asking for a load that is already running should return the running job"
+    assert sourcer.get_job(job.job_id) is job
+
+    all_job = sourcer.start_load_job()
+    assert all_job is not job
+    assert all_job.source_id is None
+
+    await asyncio.gather(job.task, all_job.task)
+    assert run_log.count("slow-job started") == 1
+    assert job.status == STATUS_COMPLETED
+    assert job.job_info()["result"] == "Fake Source Completed"
+    assert all_job.status == STATUS_COMPLETED
+
+    boom_job = sourcer.start_load_job("boom-job")
+    await boom_job.task
+    assert (
+        boom_job.status == STATUS_COMPLETED
+    ), "Source failures are reported by the Source, not the job"
+    assert boom_job.job_info()["result"].startswith("'boom-job' source failed to load")
+
+    new_job = sourcer.start_load_job("slow-job")
+    assert new_job is not job
+    await new_job.task
+    assert [j.job_id for j in sourcer.jobs()] == [
+        new_job.job_id,
+        boom_job.job_id,
+        all_job.job_id,
+        job.job_id,
+    ]
+    assert sourcer.get_job("not-a-job") is None
+
+
+async def test_source_timeout():
+    teller = create_test_teller()
+    source = FakeSource("too-slow", delay=10, timeout=0.05)
+    sourcer = Sourcer(teller, [source])
+
+    start = time.monotonic()
+    message = await sourcer.load_source_for_id("too-slow")
+    assert time.monotonic() - start < 1
+    assert source.load_failed
+    assert (
+        message
+        == "'too-slow' source did not finish loading within 0.05 seconds, so was cancelled."
+    )
+    assert source.run_result is None, "The timed out load should have been cancelled"
+
+
+async def test_cancel_source_load():
+    teller = create_test_teller()
+    source = FakeSource("cancel-me", delay=10)
+    sourcer = Sourcer(teller, [source])
+
+    assert not sourcer.cancel_load("cancel-me"), "Nothing to cancel yet"
+    job = sourcer.start_load_job("cancel-me")
+    await asyncio.sleep(0.01)
+    assert sourcer.is_loading("cancel-me")
+    assert sourcer.cancel_load("cancel-me")
+
+    with pytest.raises(asyncio.CancelledError):
+        await job.task
+    assert job.status == STATUS_FAILED
+    assert source.load_failed
+    assert (
+        source.source_info()["last_run_message"]
+        == "'cancel-me' source load was cancelled."
+    )
+    assert not sourcer.is_loading("cancel-me")
+
+
+async def test_cancelling_a_load_does_not_stop_the_scheduler():
+    teller = create_test_teller()
+    run_log = []
+    cancel_me = GatedSource("cancel-me", period=10, run_log=run_log)
+    cancel_me.gate.clear()
+    clock = FakeClock()
+    sourcer = Sourcer(
+        teller,
+        [
+            cancel_me,
+            FakeSource(
+                "dependent", period=10, dependencies=["cancel-me"], run_log=run_log
+            ),
+        ],
+        clock=clock.time,
+        sleep=clock.sleep,
+    )
+
+    periodic_loads = sourcer.start_periodic_loads()
+    await asyncio.sleep(0.01)
+    assert sourcer.cancel_load("cancel-me")
+    await asyncio.sleep(0.01)
+    assert cancel_me.run_history[0].status == STATUS_FAILED
+    assert cancel_me.consecutive_failures == 0, "A cancel isn't a failure"
+    assert "dependent finished" in run_log, "The startup load carries on without it"
+
+    cancel_me.gate.set()
+    await asyncio.sleep(0.01)
+    assert not periodic_loads.done(), "The scheduler carries on too"
+    assert "cancel-me finished" in run_log
+    periodic_loads.cancel()
+
+
+async def test_source_circuit_breaker():
+    teller = create_test_teller()
+    source = FakeSource("flaky", boom=True)
+    sourcer = Sourcer(teller, [source])
+
+    for failures in range(1, Source.CIRCUIT_BREAKER_FAILURES):
+        await sourcer.load_sources()
+        assert source.consecutive_failures == failures
+        assert not source.circuit_open()
+
+    await sourcer.load_sources()
+    assert source.circuit_open()
+    info = source.source_info()
+    assert info["consecutive_failures"] == Source.CIRCUIT_BREAKER_FAILURES
+    assert info["circuit_open_until"] is not None
+    assert not source.circuit_open(
+        as_of=now() + timedelta(seconds=Source.CIRCUIT_BREAKER_BACKOFF + 1)
+    ), "The circuit breaker should close again after the backoff"
+
+    last_run = source.last_run
+    message = await Sourcer.run_load_source(source)
+    assert message.startswith("'flaky' source will not load, as it has failed 3 times")
+    assert source.last_run == last_run, "An open circuit breaker skips the load"
+
+    await sourcer.load_source_for_id("flaky")
+    assert (
+        source.consecutive_failures == Source.CIRCUIT_BREAKER_FAILURES + 1
+    ), "Explicitly loading a source ignores its circuit breaker"
+    assert source.circuit_open(
+        as_of=now() + timedelta(seconds=Source.CIRCUIT_BREAKER_BACKOFF + 1)
+    ), "Each further failure should double the backoff"
+    assert not source.circuit_open(
+        as_of=now() + timedelta(seconds=Source.CIRCUIT_BREAKER_BACKOFF * 2 + 1)
+    )
+
+    source._boom = False
+    await sourcer.load_source_for_id("flaky")
+    assert source.load_completed
+    assert source.consecutive_failures == 0
+    assert not source.circuit_open()
+    assert source.source_info()["circuit_open_until"] is None
+
+
+class MeteredSource(FakeSource):
+    RUN_HISTORY_SIZE = 3
+
+    async def load_source(self):
+        for _ in range(2):
+            await self.run_blocking(lambda: "fetched")
+        self.record_external_call(bytes_fetched=100)
+        self.record_tells(created=1, changed=2, unchanged=3)
+        return await super().load_source()
+
+
+async def test_source_run_metrics():
+    teller = create_test_teller()
+    source = MeteredSource("metered")
+    sourcer = Sourcer(teller, [source])
+
+    info = source.source_info()
+    assert info["run_history"] == []
+    assert info["run_percentiles"]["duration_seconds"] == {
+        "p50": None,
+        "p90": None,
+        "p99": None,
+    }
+
+    await sourcer.load_source_for_id("metered")
+    run = source.source_info()["run_history"][0]
+    assert run["status"] == STATUS_COMPLETED
+    assert run["duration_seconds"] >= 0
+    assert run["external_calls"] == 3
+    assert run["bytes_fetched"] == 100
+    assert run["tells_created"] == 1
+    assert run["tells_changed"] == 2
+    assert run["tells_unchanged"] == 3
+
+    source._boom = True
+    for _ in range(4):
+        await sourcer.load_source_for_id("metered")
+    history = source.source_info()["run_history"]
+    assert (
+        len(history) == MeteredSource.RUN_HISTORY_SIZE
+    ), "Only the most recent runs are kept"
+    assert [run["status"] for run in history] == [STATUS_FAILED] * 3
+
+    percentiles = source.source_info()["run_percentiles"]
+    assert percentiles["tells_touched"] == {"p50": 6, "p90": 6, "p99": 6}
+    assert percentiles["external_calls"]["p99"] == 3
+
+
+async def test_source_state_survives_restarts():
+    teller = create_test_teller()
+    source = FakeSource("stateful", teller=teller, period=3600)
+    once_source = FakeSource(
+        "stateful-once", teller=teller, run_restriction=Source.RUN_ON_STARTUP
+    )
+    await Sourcer(teller, [source, once_source]).load_sources()
+    source.save_checkpoint("cursor", 42)
+
+    # Simulate a restart, where brand new sources start up against the (reloaded) Tells
+    run_log = []
+    restarted = FakeSource("stateful", teller=teller, period=3600, run_log=run_log)
+    restarted_once = FakeSource(
+        "stateful-once",
+        teller=teller,
+        run_restriction=Source.RUN_ON_STARTUP,
+        run_log=run_log,
+    )
+    sourcer = Sourcer(teller, [restarted, restarted_once])
+    assert restarted.last_run is None
+    sourcer.restore_source_state()
+
+    assert restarted.last_run == source.last_run
+    assert restarted.last_success == source.last_run
+    assert restarted.load_completed
+    assert restarted.checkpoint("cursor") == 42
+    assert restarted.checkpoint("not-saved", "default") == "default"
+
+    assert restarted.is_fresh()
+    assert not restarted.is_fresh(as_of=now() + timedelta(seconds=3601))
+    assert not restarted_once.is_fresh(), "Startup sources are never fresh"
+    assert restarted_once.should_run, "Startup sources run again after a restart"
+
+    await sourcer.load_sources(skip_fresh=True)
+    assert run_log == ["stateful-once started", "stateful-once finished"]
+
+    await sourcer.load_sources()
+    assert "stateful started" in run_log, "Only the startup load skips fresh sources"
+
+
+async def test_interrupted_run_is_restored_as_failed():
+    teller = create_test_teller()
+    source = FakeSource("interrupted", teller=teller)
+    source.status_starting()
+
+    restarted = FakeSource("interrupted", teller=teller)
+    restarted.restore_state()
+    assert restarted.load_failed
+    assert restarted.last_success is None
+    assert not restarted.is_fresh()
+
+
+class PersistingSource(FakeSource):
+    async def load_source(self):
+        self.persist()
+        return await super().load_source()
+
+
+async def test_source_state_is_persisted_with_the_run():
+    teller = create_test_teller()
+    source = PersistingSource("persisting", teller=teller)
+    persisted_states = []
+    teller.persist = lambda: persisted_states.append(
+        source.source_tell.get_datum(Source.STATE_DATA, "status")
+    )
+
+    await Sourcer.run_load_source(source)
+    assert persisted_states == [
+        STATUS_COMPLETED
+    ], "The Teller should be persisted once, after the run's final state is saved"
+
+    source.persist()
+    assert len(persisted_states) == 2, "Outside of a run, persisting is immediate"
+
+
+async def test_broken_process_pool_is_replaced():
+    source = FakeSource()
+    pool = _cpu_bound_pool()
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os._exit, 1).result()
+
+    assert (
+        await source.run_cpu_bound(threading.get_ident) != threading.get_ident()
+    ), "Still kept off the event loop"
+    assert _cpu_bound_pool() is not pool, "The broken pool is started over"
+    assert await source.run_cpu_bound(sum, [4, 5, 6]) == 15
+
+    replacement = _cpu_bound_pool()
+    await close_cpu_bound_pool()
+    assert _cpu_bound_pool() is not replacement, "A new pool is started once closed"
+    await close_cpu_bound_pool()
+
+
 def test_source_tell():
     pass
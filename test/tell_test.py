@@ -1,4 +1,6 @@
+import json
 import string
+import sys
 from json import JSONDecodeError
 
 import pytest
@@ -314,6 +316,22 @@ def test_tell_to_from_json():
     assert tell_from_string.audit_info.seconds_since_last_modified(modified) == 0
 
 
+def test_tell_strings_are_interned():
+    tell = create_maximal_tell()
+    tell.add_tags(["".join(["coffee", "-", "bot"])])
+    tell.update_datum_from_source("".join(["user", "-info"]), "".join(["Git", "Hub"]), "x")
+
+    new_tell = Tell.from_json_pickle(tell.to_json_pickle())
+    interned_tags = [tag for tag in new_tell.tags if tag == "coffee-bot"]
+    assert interned_tags[0] is sys.intern("coffee-bot")
+    assert Tell.slugify("Coffee Bot") is sys.intern("coffee-bot")
+    for source_id, data in new_tell.get_data_dict().items():
+        assert source_id is sys.intern(source_id)
+        for key in data:
+            assert key is sys.intern(key)
+    assert new_tell.get_datum("user-info", "GitHub") == "x"
+
+
 def test_tell_to_simple_and_minimal_json():
     tell = Tell(
         alias="tellus", category=tellus.configuration.TELLUS_INTERNAL, go_url="/tellus"
@@ -356,6 +374,66 @@ def test_tell_to_simple_and_minimal_json():
     )
 
 
+def test_cached_representations():
+    tell = Tell("tellus", TELLUS_INTERNAL, go_url="/tellus")
+    minimal_json = tell.to_simple_json(minimal=True)
+    full_json = tell.to_simple_json()
+    assert tell.minimal_json() is minimal_json, "Representations are cached..."
+    assert tell.to_simple_json() is full_json
+    assert tell.minimal_tell_dict() is not tell.minimal_tell_dict(), (
+        "...but dicts are handed out as copies, so callers can't change the cache"
+    )
+
+    tell.minimal_tell_dict()["tags"] = "not really"
+    assert tell.minimal_tell_dict()["tags"] == []
+
+    tell.add_tag("test")
+    assert tell.minimal_json() != minimal_json, "...and are dropped on any change"
+    assert json.loads(tell.minimal_json())["tags"] == ["test"]
+
+    full_json = tell.to_simple_json()
+    tell.update_datum_from_source(SRC_UNSPECIFIED, "more", "data")
+    assert json.loads(tell.to_simple_json())["data"][SRC_UNSPECIFIED] == {
+        "more": "data"
+    }
+    assert tell.to_simple_json() != full_json
+
+    tell.add_category(TELLUS_GO)
+    assert json.loads(tell.minimal_json())["categories"] == [TELLUS_GO, TELLUS_INTERNAL]
+
+    assert json.loads(tell.to_simple_json({"extra": "extra"}))["extra"] == "extra"
+    assert "extra" not in tell.tell_dict(), "Additional properties are never cached"
+
+    tell.tell_dict()["tags"].append("not really")
+    tell.tell_dict()["categories"].clear()
+    tell.tell_dict()["data"][SRC_UNSPECIFIED]["more"] = "not really"
+    assert tell.tell_dict()["tags"] == ["test"], "Nested lists are copies too"
+    assert tell.tell_dict()["categories"] == [TELLUS_GO, TELLUS_INTERNAL]
+    assert tell.tell_dict()["data"][SRC_UNSPECIFIED] == {"more": "data"}
+    assert json.loads(tell.minimal_json())["tags"] == ["test"]
+
+
+def test_unchanged_source_data_keeps_cached_representations():
+    tell = Tell("tellus", TELLUS_INTERNAL)
+    data = {
+        Tell.DESCRIPTION: "Tellus",
+        Tell.GO_URL: "/tellus",
+        Tell.TAGS: "one, two",
+        "more": "data",
+    }
+    tell.update_data_from_source(SRC_UNSPECIFIED, data)
+    full_json = tell.to_simple_json()
+
+    tell.update_data_from_source(SRC_UNSPECIFIED, data)
+    tell.add_tag("one")
+    assert (
+        tell.to_simple_json() is full_json
+    ), "Sources re-sending the same data don't drop the cache"
+
+    tell.update_datum_from_source(SRC_UNSPECIFIED, Tell.DESCRIPTION, "Changed")
+    assert json.loads(tell.to_simple_json())["description"] == "Changed"
+
+
 def test_go_url():
     tell = Tell("tellus", TELLUS_TESTING)
     assert tell.go_url is None
@@ -899,6 +977,68 @@ def test_data_blocks():
     assert tell.clear_data(SRC_UNSPECIFIED) is None
 
 
+def test_unchanged_data_is_not_rewritten():
+    tell = Tell("test-unchanged", TELLUS_TESTING)
+    source_data = {
+        Tell.ALIAS: "test-unchanged",
+        Tell.DESCRIPTION: "Same as it ever was",
+        Tell.TAGS: "once, in, a, lifetime",
+        "nested": {"list": ["water", "flowing"]},
+    }
+    tell.update_data_from_source(SRC_UNSPECIFIED, source_data, replace_data=True)
+    assert tell.tags == ["a", "in", "lifetime", "once"]
+    assert tell.audit_info.last_modified_by == SRC_UNSPECIFIED
+
+    source_data["nested"]["list"].append("underground")
+    assert tell.get_datum(SRC_UNSPECIFIED, "nested") == {
+        "list": ["water", "flowing"]
+    }, "Mutable source data is copied on update, not shared."
+
+    tell.update_data_from_source(
+        SRC_UNSPECIFIED,
+        {
+            Tell.ALIAS: "test-unchanged",
+            Tell.DESCRIPTION: "Same as it ever was",
+            Tell.TAGS: "once, in, a, lifetime",
+            "nested": {"list": ["water", "flowing"]},
+        },
+        modified_by="talking-heads",
+        replace_data=True,
+    )
+    assert (
+        tell.audit_info.last_modified_by == SRC_UNSPECIFIED
+    ), "Replacing data with identical data should not modify the Tell."
+    tell.update_datum_from_source(
+        SRC_UNSPECIFIED, Tell.DESCRIPTION, "Same as it ever was", "talking-heads"
+    )
+    assert tell.audit_info.last_modified_by == SRC_UNSPECIFIED
+
+    tell.update_datum_from_source(
+        SRC_UNSPECIFIED, Tell.DESCRIPTION, "Letting the days go by", "talking-heads"
+    )
+    assert tell.audit_info.last_modified_by == "talking-heads"
+    assert tell.description == "Letting the days go by"
+
+    tell.update_datum_from_source(TELLUS_DNS, "band", "Talking Heads")
+    tell.remove_category(TELLUS_DNS)
+    tell.update_datum_from_source(TELLUS_DNS, "band", "Talking Heads")
+    assert tell.in_category(
+        TELLUS_DNS
+    ), "Unchanged data still puts the Tell in the source's category"
+
+    members = {"byrne", "weymouth", "frantz", "harrison"}
+    tell.update_data_from_source(
+        SRC_UNSPECIFIED, {"members": members}, replace_data=True
+    )
+    members.add("eno")
+    assert tell.get_datum(SRC_UNSPECIFIED, "members") == {
+        "byrne",
+        "weymouth",
+        "frantz",
+        "harrison",
+    }, "Sets are copied too"
+
+
 def test_coalesce():
     # Just a check in case we update properties
     assert Tell.UPDATEABLE_PROPERTIES == (Tell.DESCRIPTION, Tell.GO_URL, Tell.TAGS)
@@ -376,6 +376,51 @@ def test_delete_tell():
         pass
 
 
+def test_apply_staged_tells():
+    teller = create_test_teller()
+    unchanged = teller.create_tell("unchanged", TELLUS_INTERNAL, "tells_test")
+    unchanged.update_data_from_source("staging-test", {"colour": "green"})
+    changed = teller.create_tell("changed", TELLUS_INTERNAL, "tells_test")
+    changed.update_data_from_source("staging-test", {"colour": "red"})
+    changed.add_tag("user-tag")
+    changed.update_data_from_source("someone-else", {"size": "large"})
+
+    staged_teller = Teller(None)
+    staged_teller.create_tell(
+        "unchanged", TELLUS_INTERNAL, "staging-test"
+    ).update_data_from_source("staging-test", {"colour": "green"})
+    staged_teller.create_tell(
+        "changed", TELLUS_LINK, "staging-test"
+    ).update_data_from_source("staging-test", {"colour": "blue"})
+    staged_teller.create_tell(
+        "created", TELLUS_LINK, "staging-test"
+    ).update_data_from_source("staging-test", {"colour": "purple"})
+
+    diff = teller.diff_staged_tells(staged_teller)
+    assert str(diff) == "1 created / 1 changed / 1 unchanged"
+    assert not teller.has_tell("created"), "Diffing should not change the Teller"
+    assert changed.get_datum("staging-test", "colour") == "red"
+
+    unchanged_modified = unchanged.audit_info.last_modified
+    diff = teller.apply_staged_tells(staged_teller, "staging-test")
+    assert diff.created == ["created"]
+    assert diff.changed == ["changed"]
+    assert diff.unchanged == ["unchanged"]
+
+    assert teller.get("created").get_datum("staging-test", "colour") == "purple"
+    assert changed.get_datum("staging-test", "colour") == "blue"
+    assert changed.in_all_categories([TELLUS_INTERNAL, TELLUS_LINK])
+    assert changed.has_tag("user-tag"), "Applying staged Tells only adds tags"
+    assert changed.get_datum("someone-else", "size") == "large"
+    assert changed.audit_info.last_modified_by == "staging-test"
+    assert unchanged.audit_info.last_modified == unchanged_modified
+
+    assert (
+        str(teller.diff_staged_tells(staged_teller))
+        == "0 created / 0 changed / 3 unchanged"
+    )
+
+
 def test_parse_query_string():
     categories, tags = Teller.parse_query_string(None)
     assert len(categories) == 0, f"Shouldn't have any categories: {categories}"
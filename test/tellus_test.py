@@ -497,6 +497,43 @@ async def test_route_sources(test_fs, aiohttp_client):
     ], "Should have these three sources - note the order is preserved."
 
 
+async def test_route_source_load_jobs(test_fs, aiohttp_client):
+    teller = create_test_teller()
+    sourcer = Sourcer(teller, [FakeSource(delay=0.05)])
+    app = create_and_load_test_webapp(teller, sourcer)
+    client = await aiohttp_client(app)
+
+    response = await client.get(f"/{R_SOURCES}/testing-source/load")
+    assert response.status == 200
+    job = await response.json()
+    assert job["source_id"] == "testing-source"
+    assert job["status"] == "Running", "The load should run in the background"
+
+    response = await client.get(f"/{R_SOURCES}/testing-source/load")
+    assert (await response.json())["job_id"] == job["job_id"]
+
+    await sourcer.get_job(job["job_id"]).task
+    response = await client.get(f"/{R_SOURCES}/jobs/{job['job_id']}")
+    assert response.status == 200
+    assert (await response.json())["status"] == "Completed"
+
+    response = await client.get(f"/{R_SOURCES}/load-all")
+    all_job = await response.json()
+    assert all_job["source_id"] is None
+    await sourcer.get_job(all_job["job_id"]).task
+
+    response = await client.get(f"/{R_SOURCES}/jobs")
+    assert [job_info["job_id"] for job_info in await response.json()] == [
+        all_job["job_id"],
+        job["job_id"],
+    ]
+
+    response = await client.get(f"/{R_SOURCES}/not-a-source/load")
+    assert response.status == 404
+    response = await client.get(f"/{R_SOURCES}/jobs/not-a-job")
+    assert response.status == 404
+
+
 async def test_route_dns_links(test_fs, aiohttp_client):
     teller = create_test_teller()
 
@@ -546,12 +583,14 @@ async def test_route_run_source(aiohttp_client):
     client = await aiohttp_client(app)
     response = await client.get(f"{R_SOURCES}/test-route-run-source/load")
     assert response.status == 200
-    response = await response.text()
-    assert response == "Load started for source test-route-run-source"
+    job = await response.json()
+    assert job["source_id"] == "test-route-run-source"
+    await sourcer.get_job(job["job_id"]).task
+    assert source.run_result is not None
 
     client = await aiohttp_client(app)
     response = await client.get(f"{R_SOURCES}/not_a_source/load")
-    assert response.status == 500
+    assert response.status == 404
 
 
 ###
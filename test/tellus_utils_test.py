@@ -1,10 +1,20 @@
+from aiohttp import web
+
 from tellus.tellus_sources.github_helper import verify_github_user_validity
 from tellus.tellus_utils import (
     now,
+    now_epoch_micros,
+    datetime_from_epoch_micros,
+    epoch_micros_from_datetime,
     datetime_string,
     datetime_from_string,
     prettify_string,
     prettify_datetime,
+    percentile,
+    TTLCache,
+    is_url_available,
+    http_session,
+    close_http_session,
 )
 
 
@@ -16,6 +26,24 @@ def test_tellus_time():
     assert now_datetime == datetime_from_string(now_string)
 
 
+def test_epoch_micros():
+    now_datetime = now()
+    epoch_micros = epoch_micros_from_datetime(now_datetime)
+    assert isinstance(epoch_micros, int)
+    assert datetime_from_epoch_micros(epoch_micros) == now_datetime
+    assert 0 <= now_epoch_micros() - epoch_micros < 10_000_000
+
+    assert epoch_micros_from_datetime(
+        datetime_from_string("2021-02-01T17:49:54.922667+00:00")
+    ) == epoch_micros_from_datetime(
+        datetime_from_string("2021-02-01T17:49:54.922667")
+    ), "Naive datetimes are treated as UTC"
+    assert (
+        datetime_string(datetime_from_epoch_micros(1612201794922667))
+        == "2021-02-01T17:49:54.922667+00:00"
+    )
+
+
 class MockGithubUser:
     def __init__(self, user_dict):
         self.__dict__ = user_dict
@@ -56,3 +84,96 @@ def test_prettify_datetime():
     assert (
         prettify_string("foo") == "foo"
     ), "If it isn't a valid string, it's just going to return it."
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([7], 99) == 7
+    values = [5, 1, 4, 2, 3, 6, 7, 8, 9, 10]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 90) == 9
+    assert percentile(values, 99) == 10
+    assert percentile(values, 0) == 1
+
+
+def test_ttl_cache():
+    clock = [100]
+    cache = TTLCache(10, clock=lambda: clock[0])
+    assert cache.get("quislet") is None
+    assert cache.get("quislet", "missing") == "missing"
+
+    cache.put("quislet", False)
+    assert "quislet" in cache, "Falsy values are still cached"
+    assert cache.get("quislet", "missing") is False
+
+    clock[0] = 109
+    assert cache.get("quislet") is False
+    clock[0] = 110
+    assert "quislet" not in cache, "Expired"
+    assert len(cache) == 0
+
+    cache.put("quislet", 1)
+    cache.clear()
+    assert cache.get("quislet") is None
+
+    cache.put("quislet", 1)
+    cache.put("cosmicboy", 2)
+    clock[0] = 115
+    cache.put("quislet", 3)
+    clock[0] = 121
+    cache.put("saturngirl", 4)
+    assert len(cache) == 2, "Expired entries are dropped as others are put"
+    assert cache.get("quislet") == 3, "...but not ones put again since"
+
+
+async def test_is_url_available(aiohttp_server, mocker):
+    requests = []
+
+    async def page(request):
+        requests.append((request.method, request.path, request.headers.get("Range")))
+        if request.path == "/no-head" and request.method == "HEAD":
+            return web.Response(status=405)
+        if request.path == "/dynamic" and request.method == "HEAD":
+            return web.Response(status=200)
+        if request.path == "/empty":
+            return web.Response(text="")
+        if request.path == "/missing":
+            return web.Response(text="Nope", status=404)
+        return web.Response(text="Tellus!" * 1000)
+
+    app = web.Application()
+    app.router.add_route("*", "/{page}", page)
+    server = await aiohttp_server(app)
+
+    assert await is_url_available(str(server.make_url("/available")))
+    assert requests[-1] == ("HEAD", "/available", None), "Just checks the headers"
+
+    assert await is_url_available(str(server.make_url("/no-head")))
+    assert requests[-1] == (
+        "GET",
+        "/no-head",
+        "bytes=0-1023",
+    ), "Only fetches the start of the page when the server doesn't do HEAD"
+
+    assert await is_url_available(
+        str(server.make_url("/dynamic"))
+    ), "An empty answer to a HEAD isn't trusted"
+    assert requests[-1] == ("GET", "/dynamic", "bytes=0-1023")
+
+    assert not await is_url_available(str(server.make_url("/empty")))
+    assert not await is_url_available(str(server.make_url("/missing")))
+    assert not await is_url_available("http://localhost:1/nothing-here")
+
+    head = mocker.spy(http_session(), "head")
+    get = mocker.spy(http_session(), "get")
+    await is_url_available(str(server.make_url("/no-head")))
+    assert (
+        head.call_args.kwargs["ssl"] is False and get.call_args.kwargs["ssl"] is False
+    ), "Only availability checks skip certificate verification - not the shared session"
+
+    session = http_session()
+    assert session is http_session(), "The client session is shared"
+    await close_http_session()
+    assert session.closed
+    assert http_session() is not session, "A new session is created once closed"
+    await close_http_session()
@@ -2,9 +2,14 @@
 # functionality, which is in sources_test
 
 # from tellus.creds import get_credentials_from_vault
+import asyncio
+import hashlib
+import hmac
+import json
 import os
 
 import pytest
+from aiohttp import web
 from sortedcontainers import SortedSet
 
 from tellus.configuration import (
@@ -20,7 +25,11 @@ from tellus.tellus_sources.tellus_yaml_source import (
     GITHUB_REPO_DATUM,
     TELLUS_CONFIG_TOOLS,
     ToolConfig,
+    GithubPushHandler,
+    parse_tellus_ymls,
 )
+from tellus.tellus_sources.github_helper import git_blob_sha
+from tellus.tellus_utils import close_http_session
 from test.tells_test import create_test_teller
 
 TELLUS_YML = """
@@ -608,3 +617,308 @@ github-repo: https://github.com/<org>/<alias>
     assert (
         config.data_for_keyword("github", tellus) is None
     ), "github-repo != github here"
+
+
+async def fake_github_files(aiohttp_server, file_count, extra_yml=""):
+    """
+    Serves tool-0.yml ... tool-N.yml (slowly), like Github would serve tellus.yml files to download.
+
+    :param extra_yml: anything else to put in each file
+    """
+    downloading = {"now": 0, "most": 0}
+
+    async def tellus_file(request):
+        downloading["now"] += 1
+        downloading["most"] = max(downloading["most"], downloading["now"])
+        await asyncio.sleep(0.02)
+        downloading["now"] -= 1
+        tool = request.match_info["tool"]
+        if tool == "garbled":
+            return web.Response(
+                body=b"\xff\xfe\xfa", content_type="text/plain", charset="utf-8"
+            )
+        return web.Response(
+            text=f"alias: {tool}\ndescription: The {tool} tool\n{extra_yml}"
+        )
+
+    app = web.Application()
+    app.router.add_get("/{tool}.yml", tellus_file)
+    server = await aiohttp_server(app)
+    tellus_files = [
+        (
+            f"legion/tool-{number}",
+            "tellus.yml",
+            f"sha-{number}",
+            str(server.make_url(f"/tool-{number}.yml")),
+        )
+        for number in range(file_count)
+    ]
+    return tellus_files, downloading
+
+
+async def test_load_source_downloads_concurrently(aiohttp_server, mocker):
+    tellus_files, downloading = await fake_github_files(aiohttp_server, 25)
+    tellus_files.append(
+        ("legion/missing", "tellus.yml", "sha", tellus_files[0][3] + "/missing")
+    )
+    tellus_files.append(
+        (
+            "legion/garbled",
+            "tellus.yml",
+            "sha",
+            tellus_files[0][3].replace("tool-0", "garbled"),
+        )
+    )
+    mocker.patch("tellus.tellus_sources.tellus_yaml_source.gethub")
+    mocker.patch.object(
+        TellusYMLSource,
+        "find_tellus_files",
+        return_value=(len(tellus_files), tellus_files),
+    )
+    teller = create_test_teller()
+    source = TellusYMLSource(teller)
+
+    message = await source.load_source()
+    assert message == (
+        "Success! 27 tellus.yaml files processed.  Tells: 25 created / 0 changed / 0 unchanged."
+        "  (2 files could not be downloaded.)"
+    )
+    assert teller.get("tool-24").description == "The tool-24 tool"
+    assert (
+        1 < downloading["most"] <= TellusYMLSource.DOWNLOAD_CONCURRENCY
+    ), "Downloads should happen concurrently, but only a few at a time"
+
+    await close_http_session()
+
+
+async def test_load_source_parses_batches_concurrently(aiohttp_server, mocker):
+    tellus_files, _ = await fake_github_files(aiohttp_server, 12)
+    mocker.patch("tellus.tellus_sources.tellus_yaml_source.gethub")
+    mocker.patch.object(
+        TellusYMLSource,
+        "find_tellus_files",
+        return_value=(len(tellus_files), tellus_files),
+    )
+    mocker.patch.object(TellusYMLSource, "PARSE_BATCH_SIZE", 5)
+    batches = []
+    all_parsing = asyncio.Event()
+
+    async def run_cpu_bound(_, function, *args):
+        batches.append(len(args[0]))
+        if len(batches) == 3:
+            all_parsing.set()
+        await all_parsing.wait()  # Only finish once every batch has started
+        return function(*args)
+
+    mocker.patch.object(TellusYMLSource, "run_cpu_bound", new=run_cpu_bound)
+    teller = create_test_teller()
+    source = TellusYMLSource(teller)
+
+    message = await asyncio.wait_for(source.load_source(), 5)
+    assert message.startswith(
+        "Success! 12 tellus.yaml files processed.  Tells: 12 created"
+    )
+    assert batches == [5, 5, 2]
+    assert all(teller.has_tell(f"tool-{number}") for number in range(12))
+
+    await close_http_session()
+
+
+async def test_load_source_skips_unchanged_files(aiohttp_server, mocker):
+    tellus_files, downloading = await fake_github_files(aiohttp_server, 3)
+    mocker.patch("tellus.tellus_sources.tellus_yaml_source.gethub")
+    find_tellus_files = mocker.patch.object(
+        TellusYMLSource, "find_tellus_files", return_value=(3, tellus_files)
+    )
+    parse = mocker.spy(TellusYMLSource, "stage_tellus_file")
+    teller = create_test_teller()
+    source = TellusYMLSource(teller)
+
+    await source.load_source()
+    assert parse.call_count == 3
+
+    message = await source.load_source()
+    assert parse.call_count == 3, "Nothing changed, so nothing to download or parse"
+    assert message == (
+        "Success! 3 tellus.yaml files processed.  Tells: 0 created / 0 changed / 0 unchanged."
+        "  (3 files were unchanged.)"
+    )
+
+    repo, path, _, url = tellus_files[1]
+    find_tellus_files.return_value = (
+        3,
+        [tellus_files[0], (repo, path, "a-new-sha", url), tellus_files[2]],
+    )
+    await source.load_source()
+    assert parse.call_count == 4, "Only the changed file should be parsed"
+    assert parse.call_args[0][4] == url
+
+    assert source.checkpoint(TellusYMLSource.FILE_SHAS_CHECKPOINT) == {
+        "legion/tool-0/tellus.yml": "sha-0",
+        "legion/tool-1/tellus.yml": "a-new-sha",
+        "legion/tool-2/tellus.yml": "sha-2",
+    }, "Kept on the source's Tell, so it survives restarts"
+
+    await close_http_session()
+
+
+async def test_tool_keywords_are_checked_for_unchanged_files(aiohttp_server, mocker):
+    tellus_files, _ = await fake_github_files(
+        aiohttp_server, 2, extra_yml="docs: http://docs.thelegion.org\n"
+    )
+    mocker.patch("tellus.tellus_sources.tellus_yaml_source.gethub")
+    mocker.patch.object(
+        TellusYMLSource, "find_tellus_files", return_value=(2, tellus_files)
+    )
+    parse = mocker.spy(TellusYMLSource, "stage_tellus_file")
+    teller = create_test_teller()
+    source = TellusYMLSource(teller)
+
+    await source.load_source()
+    assert not teller.has_tell(ToolConfig.tool_tell_alias("docs"))
+
+    source.tool_config().enable()
+    await source.load_source()
+    assert parse.call_count == 2, "The files themselves haven't changed"
+    docs_tell = teller.get(ToolConfig.tool_tell_alias("docs"))
+    assert docs_tell.get_data(docs_tell.alias) == {
+        "tool-0": "http://docs.thelegion.org",
+        "tool-1": "http://docs.thelegion.org",
+    }, "...but the tool config has, so their keywords still count"
+
+    await close_http_session()
+
+
+# Trimmed down from a real Github push event
+PUSH_EVENT = {
+    "ref": "refs/heads/main",
+    "before": "6113728f27ae82c7b1a177c8d03f9e96e0adf246",
+    "after": "0d1a26e67d8f5eaf1f6ba5c57fc3c7d91ac0fd1c",
+    "deleted": False,
+    "repository": {"full_name": "legion/legion-hq", "default_branch": "main",},
+    "commits": [
+        {
+            "id": "d6fde92930d4715a2b49857d24b940956b26d2d3",
+            "message": "Legion HQ tellus file",
+            "added": ["tellus.yml", "README.md"],
+            "removed": ["old/.tellus.yaml"],
+            "modified": [],
+        },
+        {
+            "id": "0d1a26e67d8f5eaf1f6ba5c57fc3c7d91ac0fd1c",
+            "message": "Flight rings",
+            "added": [],
+            "removed": [],
+            "modified": ["flight-rings/tellus.yml", "flight-rings/rings.py"],
+        },
+    ],
+}
+
+PUSHED_FILES = {
+    "tellus.yml": "alias: legion-hq\ndescription: Legion Headquarters\n",
+    "flight-rings/tellus.yml": "alias: flight-rings\ndescription: Legion flight rings\n",
+}
+
+WEBHOOK_SECRET = "long-live-the-legion"
+
+
+def github_signature(body, secret=WEBHOOK_SECRET):
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+async def post_github_event(client, event, payload, secret=WEBHOOK_SECRET):
+    body = json.dumps(payload).encode()
+    return await client.post(
+        GithubPushHandler.ROUTE,
+        data=body,
+        headers={
+            "X-GitHub-Event": event,
+            "X-Hub-Signature-256": github_signature(body, secret),
+            "Content-Type": "application/json",
+        },
+    )
+
+
+async def test_github_push_webhook(aiohttp_client, mocker):
+    fetched = []
+
+    async def fetch_pushed_file(file_url):
+        fetched.append(file_url)
+        path = file_url.split("/contents/")[1].split("?")[0]
+        return PUSHED_FILES[path]
+
+    mocker.patch(
+        "tellus.tellus_sources.tellus_yaml_source.fetch_github_file",
+        new=fetch_pushed_file,
+    )
+    teller = create_test_teller()
+    source = TellusYMLSource(teller, webhooks_enabled=True)
+    assert source.period == TellusYMLSource.RECONCILIATION_PERIOD
+    source.save_checkpoint(
+        TellusYMLSource.FILE_SHAS_CHECKPOINT,
+        {"legion/legion-hq/old/.tellus.yaml": "sha", "legion/other/tellus.yml": "sha"},
+    )
+    handler = GithubPushHandler(source, secret=WEBHOOK_SECRET)
+    app = web.Application()
+    handler.setup_routes(app.router)
+    client = await aiohttp_client(app)
+
+    response = await post_github_event(client, "push", PUSH_EVENT, secret="nope")
+    assert response.status == 401
+    response = await post_github_event(
+        client, "ping", {"zen": "Keep it logically awesome."}
+    )
+    assert await response.text() == "pong"
+
+    response = await post_github_event(client, "push", PUSH_EVENT)
+    assert response.status == 202
+    assert await response.json() == {
+        "repository": "legion/legion-hq",
+        "files": ["flight-rings/tellus.yml", "tellus.yml"],
+    }
+    await handler.wait_for_updates()
+
+    assert len(fetched) == 2, "Only the changed tellus files are downloaded"
+    assert all(PUSH_EVENT["after"] in url for url in fetched)
+    assert teller.get("legion-hq").description == "Legion Headquarters"
+    assert teller.get("flight-rings").description == "Legion flight rings"
+    assert source.checkpoint(TellusYMLSource.FILE_SHAS_CHECKPOINT) == {
+        "legion/legion-hq/tellus.yml": git_blob_sha(PUSHED_FILES["tellus.yml"]),
+        "legion/legion-hq/flight-rings/tellus.yml": git_blob_sha(
+            PUSHED_FILES["flight-rings/tellus.yml"]
+        ),
+        "legion/other/tellus.yml": "sha",
+    }, "The next full scan shouldn't need to look at these files again"
+
+    response = await post_github_event(
+        client, "push", {**PUSH_EVENT, "ref": "refs/heads/some-branch"}
+    )
+    assert await response.json() == {"repository": "legion/legion-hq", "files": []}
+    await handler.wait_for_updates()
+    assert len(fetched) == 2, "Only pushes to the default branch count"
+
+    no_after = {key: value for key, value in PUSH_EVENT.items() if key != "after"}
+    response = await post_github_event(client, "push", no_after)
+    assert response.status == 400
+    response = await post_github_event(client, "push", {"repository": "legion-hq"})
+    assert response.status == 400
+
+
+def test_git_blob_sha():
+    # As given by `echo "O HAI" | git hash-object --stdin`
+    assert git_blob_sha("O HAI\n") == "d9fb8fed18e9ea7bd8ea6bb427837c182dbd5cd1"
+
+
+async def test_parse_tellus_ymls_in_the_process_pool():
+    source = TellusYMLSource(create_test_teller())
+    tellus, bad, legion = await source.run_cpu_bound(
+        parse_tellus_ymls, [TELLUS_YML, BAD_YML, LEGION_YML]
+    )
+    assert tellus == [{"alias": "tellus", "description": "O HAI I AM TELLUS"}]
+    assert bad is None, "Parsed again when staged, to log what went wrong"
+    assert [document["alias"] for document in legion][:3] == [
+        "legion",
+        "saturn-girl",
+        "saturn-girl",
+    ]
+    assert all(type(document) is dict for document in legion), "Just plain dicts"
@@ -1,6 +1,9 @@
 # pylint: skip-file
 #   lots of stuff pylint doesn't like in here that is particular to these tests
 
+import asyncio
+import threading
+import time
 from unittest.mock import patch, MagicMock
 
 import pytest
@@ -16,7 +19,7 @@ from tellus.configuration import (
     TELLUS_USER,
 )
 from tellus.google_api_utils import retrieve_gsuite_user_directory
-from tellus.sources import Sourcer
+from tellus.sources import Sourcer, BLOCKING_IO_THREADS
 from tellus.tellus_sources.user_info_source import UserInfo
 from tellus.users import UserManager, User
 from test.tellus_test_utils import (
@@ -373,3 +376,217 @@ async def test_removed_users():
         assert users.get_active_usernames() == ["cosmicboy", "saturngirl"]
         assert not sensor.is_active()
         assert users.get("saturngirl").is_active()
+
+
+async def test_user_url_checks_are_concurrent_and_cached():
+    teller = create_test_teller()
+    usernames = [f"legionnaire{number}" for number in range(12)]
+    user_manager = UserManager(teller, usernames)
+    confluence = MagicMock(type=Confluence)
+    confluence.get_mobile_parameters.return_value = {}
+    gsuite = MagicMock(function=retrieve_gsuite_user_directory)
+    gsuite.return_value = {}
+    source = UserInfo(user_manager, confluence, gsuite)
+
+    checked = []
+    checking = {"now": 0, "most": 0}
+
+    async def url_available(url):
+        checked.append(url)
+        checking["now"] += 1
+        checking["most"] = max(checking["most"], checking["now"])
+        await asyncio.sleep(0.01)
+        checking["now"] -= 1
+        return url.startswith(CONFLUENCE_URL)
+
+    with patch(
+        "tellus.tellus_sources.user_info_source.is_url_available", new=url_available
+    ):
+        await source.load_source()
+        assert len(checked) == 24
+        assert (
+            1 < checking["most"] <= 2 * UserInfo.URL_CHECK_CONCURRENCY_PER_HOST
+        ), "Checks run concurrently, but only a few at a time for each host"
+        assert user_manager.get("legionnaire3").tell.get_data(source.source_id) == {
+            "Confluence": f"{CONFLUENCE_URL}/display/~legionnaire3"
+        }
+
+        await source.load_source()
+        assert len(checked) == 24, "Recently checked URLs are not checked again"
+
+
+async def test_confluence_profiles_are_fetched_concurrently_and_only_written_when_changed():
+    teller = create_test_teller()
+    user_manager = UserManager(teller, ["cosmicboy", "saturngirl", "lightninglad"])
+
+    fetching = {"now": 0, "most": 0}
+    lock = threading.Lock()
+
+    def slow_profile(username):
+        with lock:
+            fetching["now"] += 1
+            fetching["most"] = max(fetching["most"], fetching["now"])
+        time.sleep(0.05)
+        with lock:
+            fetching["now"] -= 1
+        return get_profile(username)
+
+    confluence = MagicMock(type=Confluence)
+    confluence.get_mobile_parameters.side_effect = slow_profile
+    gsuite = MagicMock(function=retrieve_gsuite_user_directory)
+    gsuite.return_value = {}
+    source = UserInfo(user_manager, confluence, gsuite)
+
+    with patch(
+        "tellus.tellus_sources.user_info_source.is_url_available", new=CoroutineMock()
+    ) as mocked_iua:
+        mocked_iua.return_value = False
+        await source.load_source()
+        assert fetching["most"] > 1, "Profiles are fetched concurrently"
+        assert (
+            fetching["most"] <= UserInfo.PROFILE_FETCH_CONCURRENCY < BLOCKING_IO_THREADS
+        ), "...but without taking every one of the blocking I/O threads"
+        saturngirl = user_manager.get("saturngirl")
+        assert saturngirl.full_name == "Saturn Girl"
+        last_update = assert_modified_since(saturngirl.tell, None)
+
+        await source.load_source()
+        assert confluence.get_mobile_parameters.call_count == 6
+        last_update = assert_not_modified_since(saturngirl.tell, last_update)
+
+        TEST_CONFLUENCE_USER_DATA["saturngirl"]["phone"] = "555 5555"
+        try:
+            await source.load_source()
+        finally:
+            del TEST_CONFLUENCE_USER_DATA["saturngirl"]["phone"]
+        assert_modified_since(saturngirl.tell, last_update)
+        assert saturngirl.tell.get_datum(User.USER_INFO_DATA, User.PHONE) == "555 5555"
+
+
+async def test_unchanged_users_are_skipped():
+    teller = create_test_teller()
+    user_manager = UserManager(teller, ["cosmicboy", "saturngirl"])
+    confluence = MagicMock(type=Confluence)
+    confluence.get_mobile_parameters.side_effect = get_profile
+    gsuite = MagicMock(function=retrieve_gsuite_user_directory)
+    gsuite.return_value = TEST_GSUITE_USER_DATA
+    source = UserInfo(user_manager, confluence, gsuite)
+
+    with patch(
+        "tellus.tellus_sources.user_info_source.is_url_available", new=CoroutineMock()
+    ) as mocked_iua:
+        mocked_iua.return_value = True
+        message = await Sourcer.run_load_source(source)
+        assert message == "Success! 2 users:  2 new / 0 changed / 0 unchanged."
+        cosmicboy = user_manager.get("cosmicboy")
+        assert cosmicboy.full_name == "Rokk Krinn"
+        last_update = assert_modified_since(cosmicboy.tell, None)
+
+        message = await Sourcer.run_load_source(source)
+        assert message == "Success! 2 users:  0 new / 0 changed / 2 unchanged."
+        last_update = assert_not_modified_since(cosmicboy.tell, last_update)
+        assert source.run_history[-1].tells_unchanged == 2
+
+        gsuite.return_value = {
+            **TEST_GSUITE_USER_DATA,
+            "cosmic.boy@thelegion.org": {
+                **TEST_GSUITE_USER_DATA["cosmic.boy@thelegion.org"],
+                "name": {"fullName": "Cosmic Boy"},
+            },
+        }
+        message = await Sourcer.run_load_source(source)
+        assert message == "Success! 2 users:  0 new / 1 changed / 1 unchanged."
+        assert_modified_since(cosmicboy.tell, last_update)
+        assert cosmicboy.full_name == "Cosmic Boy"
+
+    assert source.checkpoint(UserInfo.USER_FINGERPRINTS_CHECKPOINT).keys() == {
+        "cosmicboy",
+        "saturngirl",
+    }, "The fingerprints are kept on the source's Tell, so survive restarts"
+
+
+async def test_users_whose_update_failed_are_repaired():
+    teller = create_test_teller()
+    user_manager = UserManager(teller, ["cosmicboy"])
+    confluence = MagicMock(type=Confluence)
+    confluence.get_mobile_parameters.side_effect = get_profile
+    gsuite = MagicMock(function=retrieve_gsuite_user_directory)
+    gsuite.return_value = TEST_GSUITE_USER_DATA
+    source = UserInfo(user_manager, confluence, gsuite)
+
+    with patch(
+        "tellus.tellus_sources.user_info_source.is_url_available", new=CoroutineMock()
+    ) as mocked_iua:
+        mocked_iua.return_value = True
+        with patch.object(User, "promote_info", side_effect=KeyError("boom")):
+            message = await Sourcer.run_load_source(source)
+        assert message == "Success! 1 users:  1 new / 0 changed / 0 unchanged."
+        assert user_manager.get("cosmicboy").full_name != "Rokk Krinn"
+
+        # Nothing has changed, but the last update didn't go through
+        message = await Sourcer.run_load_source(source)
+        assert message == "Success! 1 users:  1 new / 0 changed / 0 unchanged."
+        assert user_manager.get("cosmicboy").full_name == "Rokk Krinn"
+
+        message = await Sourcer.run_load_source(source)
+        assert message == "Success! 1 users:  0 new / 0 changed / 1 unchanged."
+
+
+async def test_deleted_users_are_filled_in_again():
+    teller = create_test_teller()
+    user_manager = UserManager(teller, ["cosmicboy"])
+    confluence = MagicMock(type=Confluence)
+    confluence.get_mobile_parameters.side_effect = get_profile
+    gsuite = MagicMock(function=retrieve_gsuite_user_directory)
+    gsuite.return_value = TEST_GSUITE_USER_DATA
+    source = UserInfo(user_manager, confluence, gsuite)
+
+    with patch(
+        "tellus.tellus_sources.user_info_source.is_url_available", new=CoroutineMock()
+    ) as mocked_iua:
+        mocked_iua.return_value = True
+        await Sourcer.run_load_source(source)
+        assert user_manager.get("cosmicboy").full_name == "Rokk Krinn"
+
+        teller.delete_tell("cosmicboy")
+        message = await Sourcer.run_load_source(source)
+        assert message == "Success! 1 users:  0 new / 1 changed / 0 unchanged."
+        cosmicboy = user_manager.get("cosmicboy")
+        assert cosmicboy.full_name == "Rokk Krinn"
+        assert cosmicboy.tell.get_data(UserInfo.CONFLUENCE_PROFILE_DATA) is not None
+
+
+async def test_avatars_come_from_the_avatar_cache():
+    teller = create_test_teller()
+    user_manager = UserManager(teller, ["saturngirl", "lightninglad"])
+    confluence = MagicMock(type=Confluence)
+    confluence.get_mobile_parameters.side_effect = get_profile
+    gsuite = MagicMock(function=retrieve_gsuite_user_directory)
+    gsuite.return_value = {}
+    avatar_cache = MagicMock()
+    avatar_cache.refresh = CoroutineMock(return_value="/a/saturngirl?v=42")
+    avatar_cache.save_index = CoroutineMock()
+    source = UserInfo(user_manager, confluence, gsuite, avatar_cache=avatar_cache)
+
+    with patch(
+        "tellus.tellus_sources.user_info_source.is_url_available", new=CoroutineMock()
+    ) as mocked_iua:
+        mocked_iua.return_value = False
+        await source.load_source()
+
+    avatar_cache.refresh.assert_called_once_with(
+        "saturngirl", f"{CONFLUENCE_URL}/some/url/for/saturngirl"
+    )
+    avatar_cache.save_index.assert_called_once_with()
+    assert (
+        user_manager.get("saturngirl").tell.get_datum(
+            User.USER_INFO_DATA, User.AVATAR_URL
+        )
+        == "/a/saturngirl?v=42"
+    )
+    assert (
+        user_manager.get("lightninglad").tell.get_datum(
+            User.USER_INFO_DATA, User.AVATAR_URL
+        )
+        is None
+    )
@@ -270,7 +270,9 @@ export function tellusUserCard(user) {
 
     userCard.find('.userCardEmail').text(user.email);
     userCard.find('.userCardEmail').attr("href", "mailto:" +user.email);
-    // userCard.find('.userCardAvatar').attr("src", user.avatarURL)  TODO: uncomment when figure out Confluence access
+    if (user.avatarURL) {
+        userCard.find('.userCardAvatar').attr("src", user.avatarURL);
+    }
 
     return userCard;
 }